@@ -0,0 +1,45 @@
+"""job queue columns
+
+Revision ID: 3f1c9b2d7e64
+Revises: 8a5a01f35512
+Create Date: 2026-10-17 09:12:41.508213
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c9b2d7e64"
+down_revision: Union[str, Sequence[str], None] = "8a5a01f35512"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.add_column(
+            sa.Column("worker_id", sa.String(length=100), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column("attempts", sa.Integer(), server_default="0", nullable=False)
+        )
+        batch_op.add_column(
+            sa.Column("started_at", sa.DateTime(timezone=True), nullable=True)
+        )
+        batch_op.create_index(
+            batch_op.f("ix_jobs_status_id"), ["status_id"], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.drop_index(batch_op.f("ix_jobs_status_id"))
+        batch_op.drop_column("started_at")
+        batch_op.drop_column("attempts")
+        batch_op.drop_column("worker_id")
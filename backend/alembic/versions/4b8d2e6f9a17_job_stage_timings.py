@@ -0,0 +1,31 @@
+"""job stage timings
+
+Revision ID: 4b8d2e6f9a17
+Revises: 9c4e1f7b3a62
+Create Date: 2026-10-18 09:21:37.418265
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4b8d2e6f9a17"
+down_revision: Union[str, Sequence[str], None] = "9c4e1f7b3a62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.add_column(sa.Column("stage_timings", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.drop_column("stage_timings")
@@ -0,0 +1,35 @@
+"""job batch id
+
+Revision ID: 5d93f0c6a1b8
+Revises: e51a7c08d2f9
+Create Date: 2026-10-17 23:02:51.640371
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d93f0c6a1b8"
+down_revision: Union[str, Sequence[str], None] = "e51a7c08d2f9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.add_column(sa.Column("batch_id", sa.String(length=36), nullable=True))
+        batch_op.create_index(
+            batch_op.f("ix_jobs_batch_id"), ["batch_id"], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.drop_index(batch_op.f("ix_jobs_batch_id"))
+        batch_op.drop_column("batch_id")
@@ -0,0 +1,35 @@
+"""job progress
+
+Revision ID: 9c4e1f7b3a62
+Revises: 5d93f0c6a1b8
+Create Date: 2026-10-17 23:48:12.905317
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4e1f7b3a62"
+down_revision: Union[str, Sequence[str], None] = "5d93f0c6a1b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.add_column(sa.Column("stage", sa.String(length=50), nullable=True))
+        batch_op.add_column(
+            sa.Column("progress", sa.Integer(), server_default="0", nullable=False)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.drop_column("progress")
+        batch_op.drop_column("stage")
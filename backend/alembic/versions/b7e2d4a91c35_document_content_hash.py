@@ -0,0 +1,37 @@
+"""document content hash
+
+Revision ID: b7e2d4a91c35
+Revises: 3f1c9b2d7e64
+Create Date: 2026-10-17 22:04:18.730254
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2d4a91c35"
+down_revision: Union[str, Sequence[str], None] = "3f1c9b2d7e64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("documents") as batch_op:
+        batch_op.add_column(
+            sa.Column("content_hash", sa.String(length=64), nullable=True)
+        )
+        batch_op.create_index(
+            batch_op.f("ix_documents_content_hash"), ["content_hash"], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("documents") as batch_op:
+        batch_op.drop_index(batch_op.f("ix_documents_content_hash"))
+        batch_op.drop_column("content_hash")
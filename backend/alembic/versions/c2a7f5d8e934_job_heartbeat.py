@@ -0,0 +1,33 @@
+"""job heartbeat
+
+Revision ID: c2a7f5d8e934
+Revises: 4b8d2e6f9a17
+Create Date: 2026-10-18 14:02:51.906112
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c2a7f5d8e934"
+down_revision: Union[str, Sequence[str], None] = "4b8d2e6f9a17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.add_column(
+            sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.drop_column("heartbeat_at")
@@ -0,0 +1,127 @@
+# benchmarks/importtime.py
+"""
+Import-time budget of the web app.
+
+Run from backend/:
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --budget 1000 --top 30
+
+Imports main in a fresh interpreter under `python -X importtime`, prints
+the slowest modules and checks that the API stays within budget and free of
+the analysis stack. Models and plotting are only loaded by the workers, or
+on first use (see get_result_file() in routers/document.py). The exit status
+is 1 if the budget is exceeded or a forbidden package was imported.
+"""
+
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass
+
+# Packages the web process must not import at startup
+FORBIDDEN = (
+    "keras",
+    "matplotlib",
+    "numpy",
+    "pandas",
+    "rasterio",
+    "segment_anything",
+    "segmenteverygrain",
+    "shapely",
+    "skimage",
+    "tensorflow",
+    "torch",
+)
+
+
+@dataclass
+class ImportTime:
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def measure(module: str) -> list[ImportTime]:
+    """Import times of everything that importing module imports, in order."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    lines = result.stderr.splitlines()
+    if result.returncode != 0:
+        error = [line for line in lines if not line.startswith("import time:")]
+        sys.exit(f"Importing {module} failed:\n" + "\n".join(error))
+
+    times = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Header line
+        times.append(
+            ImportTime(
+                module=fields[2].strip(),
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+            )
+        )
+    return times
+
+
+def top_level(times: list[ImportTime]) -> dict[str, int]:
+    """Microseconds spent in the modules of each top-level package, slowest first."""
+    totals = {}
+    for t in times:
+        package = t.module.split(".")[0]
+        totals[package] = totals.get(package, 0) + t.self_us
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the web app import time")
+    parser.add_argument("--module", default="main", help="module to import")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=2000,
+        help="milliseconds the import may take",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="imports, best counts")
+    parser.add_argument("--top", type=int, default=20, help="modules to list")
+    args = parser.parse_args()
+
+    # The first run also warms the bytecode and file system caches
+    runs = [measure(args.module) for _ in range(args.repeat)]
+    times = min(runs, key=lambda run: sum(t.self_us for t in run))
+    total_ms = sum(t.self_us for t in times) / 1000
+
+    print(f"Slowest modules importing {args.module} (ms):")
+    print(f"{'cumulative':>10} {'self':>8}  module")
+    for t in sorted(times, key=lambda t: -t.cumulative_us)[: args.top]:
+        print(f"{t.cumulative_us / 1000:10.1f} {t.self_us / 1000:8.1f}  {t.module}")
+
+    print("\nSlowest packages (ms):")
+    for package, us in list(top_level(times).items())[: args.top]:
+        print(f"{us / 1000:10.1f}  {package}")
+
+    failed = False
+    print(f"\nTotal {total_ms:.0f} ms, budget {args.budget:.0f} ms")
+    if total_ms > args.budget:
+        print("Over budget")
+        failed = True
+
+    imported = {t.module.split(".")[0] for t in times}
+    forbidden = sorted(imported.intersection(FORBIDDEN))
+    if forbidden:
+        print(f"Imported at startup, should be deferred: {', '.join(forbidden)}")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+# benchmarks/loadtest.py
+"""
+Load test of the API against a stand-in analyzer, in a single process.
+
+Run from backend/:
+
+    python -m benchmarks.loadtest --users 20 --iterations 5
+    python -m benchmarks.loadtest --analysis-latency 5 --analysis-workers 4
+    python -m benchmarks.loadtest --database-url postgresql://user:pw@localhost/loadtest
+
+Drives the FastAPI app of main.py through httpx's ASGI transport. Every
+virtual user logs in, then repeatedly uploads an image, polls its status
+until it's analyzed, lists its documents and downloads every result file
+and the document's archive; finally it downloads all its documents as one
+batch archive. Jobs are run by in-process workers with FakeAnalyzer, which
+waits a configurable time and writes results for synthetic grains.
+
+A fresh SQLite database in a temporary directory is used unless
+--database-url is given. That database should be a throwaway one: it is
+migrated and seeded with test accounts.
+
+Reports p50/p95/p99 latency and throughput per endpoint. Client and server
+share one process, so compare runs with each other rather than reading
+the numbers as production latencies.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from core.progress import no_progress
+
+# Everything reading settings (core.config, main, ...) is imported inside the
+# functions, once configure() set the environment up
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Result file endpoints, under /documents/{id}/download/
+DOWNLOADS = ("csv", "mask", "grains", "histogram", "geojson", "mask-preview", "all")
+
+FINAL_STATUSES = ("Processed", "Error")
+
+ACCOUNT_PASSWORD = "password"
+
+
+class FakeAnalyzer:
+    """
+    Stands in for GrainAnalyzer: sleeps for the analysis latency, then
+    writes the result files of synthetic grains like a real analysis.
+
+    Parameters
+    ----------
+    latency : float
+        Seconds each analysis takes, on average.
+    jitter : float
+        Maximum deviation from latency, in seconds, drawn uniformly.
+    grains : int
+        Grains "found" in every image.
+    """
+
+    def __init__(self, latency: float, jitter: float = 0.0, grains: int = 200):
+        self.latency = latency
+        self.jitter = jitter
+        self.grains = grains
+
+    def analyze(self, image_path: str, output_prefix: str, progress=no_progress) -> int:
+        from benchmarks.synthetic import make_polygons
+        from core import artifacts
+        from core import interactions as si
+        from core.config import settings
+        from core.grain_analysis import ANALYSIS_PARAMS
+
+        time.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0))
+
+        image = np.asarray(Image.open(image_path).convert("RGB"))
+        polygons = make_polygons(self.grains, image.shape[:2])
+        grains = si.GrainCollection.from_polygons(polygons, image=image)
+        grains.measure()
+        summary = si.get_summary(grains, ANALYSIS_PARAMS["px_per_m"])
+        artifacts.write_artifacts(
+            output_prefix,
+            image,
+            grains,
+            summary,
+            eager=settings.EAGER_ARTIFACTS,
+            overlay=settings.ANALYSIS_OVERLAY,
+            max_workers=settings.ARTIFACT_WORKERS,
+            progress=progress,
+        )
+        return len(grains)
+
+
+class Stats:
+    """Latencies and errors per endpoint."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self, wall_time: float) -> list[dict]:
+        rows = []
+        for endpoint, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            rows.append(
+                {
+                    "endpoint": endpoint,
+                    "count": len(latencies),
+                    "errors": self.errors[endpoint],
+                    "p50": percentile(latencies, 50),
+                    "p95": percentile(latencies, 95),
+                    "p99": percentile(latencies, 99),
+                    "max": latencies[-1],
+                    "mean": statistics.fmean(latencies),
+                    "throughput": len(latencies) / wall_time,
+                }
+            )
+        return rows
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    rank = max(int(np.ceil(q / 100 * len(sorted_values))), 1)
+    return sorted_values[rank - 1]
+
+
+def configure(database_url: str, work_dir: Path):
+    """
+    Point the app at the load test's database and directories. Must run
+    before anything imports core.config.
+    """
+    os.environ["DATABASE_URL"] = database_url
+    # Otherwise DATABASE_URL is replaced by the DB_* variables
+    os.environ["DEBUG"] = "True"
+    os.environ["UPLOAD_DIR"] = str(work_dir / "uploads")
+    os.environ["RESULT_CACHE_DIR"] = str(work_dir / "cache")
+    os.environ["ALLOWED_EXTENSIONS"] = ".png"
+
+
+def prepare_database(accounts: int) -> list[str]:
+    """Migrate and seed the database, return the test accounts' emails."""
+    from alembic.config import Config
+
+    from alembic import command
+    from core.security import get_password_hash
+    from db.database import SessionLocal
+    from db.seeders.seed_roles import seed_roles
+    from db.seeders.seed_statuses import seed_statuses
+    from models.role import Role
+    from models.status import Status
+    from models.user import User
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    command.upgrade(config, "head")
+    seed_roles()
+    seed_statuses()
+
+    emails = [f"loadtest{i}@example.com" for i in range(accounts)]
+    db = SessionLocal()
+    try:
+        active = db.query(Status).filter(Status.name == "Active").one()
+        role = db.query(Role).filter(Role.name == "User").one()
+        password = get_password_hash(ACCOUNT_PASSWORD)
+        existing = {
+            email for (email,) in db.query(User.email).filter(User.email.in_(emails))
+        }
+        for i, email in enumerate(emails):
+            if email not in existing:
+                db.add(
+                    User(
+                        email=email,
+                        password=password,
+                        first_name="Load",
+                        last_name=f"Test {i}",
+                        status_id=active.id,
+                        role_id=role.id,
+                    )
+                )
+        db.commit()
+    finally:
+        db.close()
+    return emails
+
+
+def start_workers(count: int, analyzer: FakeAnalyzer, stop: threading.Event):
+    """Run the job queue on `count` threads, with the fake analyzer."""
+    from db.database import SessionLocal
+    from tasks import document_tasks
+    from tasks.job_queue import claim_next_job
+    from tasks.worker import run_job
+
+    document_tasks.get_grain_analyzer = lambda: analyzer
+    # No checkpoints to key results on, uploads are all different anyway
+    document_tasks.MODEL_FILES = ()
+
+    def work(worker_id: str):
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                job = claim_next_job(db, worker_id)
+                job_id = job.id if job else None
+            except Exception as e:
+                logging.warning(f"Worker {worker_id} failed to claim a job: {e}")
+                job_id = None
+            finally:
+                db.close()
+            if job_id is None:
+                stop.wait(0.1)
+                continue
+            try:
+                run_job(job_id)
+            except Exception as e:
+                logging.error(f"Worker {worker_id} crashed on job {job_id}: {e}")
+
+    threads = [
+        threading.Thread(target=work, args=(f"loadtest:{i}",), daemon=True)
+        for i in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def make_image(size: int) -> bytes:
+    """A PNG of random noise, different every time so no result is cached."""
+    pixels = np.random.default_rng().integers(0, 256, (size, size, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def request(client, stats: Stats, endpoint: str, method: str, url: str, **kw):
+    """Send a request and record its latency, body included."""
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kw)
+    except Exception as e:
+        stats.record(endpoint, time.perf_counter() - start, ok=False)
+        logging.warning(f"{endpoint} failed: {e}")
+        return None
+    stats.record(endpoint, time.perf_counter() - start, ok=response.is_success)
+    return response
+
+
+async def virtual_user(client, stats: Stats, email: str, args):
+    response = await request(
+        client,
+        stats,
+        "POST /auth/token",
+        "POST",
+        "/auth/token",
+        data={"username": email, "password": ACCOUNT_PASSWORD},
+    )
+    if response is None or not response.is_success:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    document_ids = []
+    for _ in range(args.iterations):
+        image = await asyncio.to_thread(make_image, args.image_size)
+        response = await request(
+            client,
+            stats,
+            "POST /documents/upload",
+            "POST",
+            "/documents/upload",
+            headers={**headers, "Content-Type": "image/png"},
+            params={"filename": "loadtest.png"},
+            content=image,
+        )
+        if response is None or not response.is_success:
+            continue
+        document_id = response.json()["id"]
+
+        status = None
+        while status not in FINAL_STATUSES:
+            await asyncio.sleep(args.poll_interval)
+            response = await request(
+                client,
+                stats,
+                "GET /documents/{id}",
+                "GET",
+                f"/documents/{document_id}",
+                headers=headers,
+            )
+            if response is not None and response.is_success:
+                status = response.json()["status"]["name"]
+
+        await request(
+            client, stats, "GET /documents", "GET", "/documents", headers=headers
+        )
+        if status != "Processed":
+            continue
+        document_ids.append(document_id)
+        for kind in DOWNLOADS:
+            await request(
+                client,
+                stats,
+                f"GET /documents/{{id}}/download/{kind}",
+                "GET",
+                f"/documents/{document_id}/download/{kind}",
+                headers=headers,
+            )
+
+    if document_ids:
+        await request(
+            client,
+            stats,
+            "POST /documents/download",
+            "POST",
+            "/documents/download",
+            headers=headers,
+            json={"document_ids": document_ids},
+        )
+
+
+async def run_load(app, args, emails: list[str]) -> tuple[Stats, float]:
+    import httpx
+
+    from core.config import settings
+
+    stats = Stats()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url=f"http://loadtest{settings.API_PREFIX}",
+        timeout=None,
+    ) as client:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                virtual_user(client, stats, emails[i % len(emails)], args)
+                for i in range(args.users)
+            )
+        )
+        wall_time = time.perf_counter() - start
+    return stats, wall_time
+
+
+def print_report(rows: list[dict], wall_time: float):
+    print(
+        f"\n{'endpoint':<44} {'count':>6} {'errors':>6} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'req/s':>8}"
+    )
+    for row in rows:
+        print(
+            f"{row['endpoint']:<44} {row['count']:>6} {row['errors']:>6} "
+            f"{row['p50'] * 1000:>9.1f} {row['p95'] * 1000:>9.1f} "
+            f"{row['p99'] * 1000:>9.1f} {row['max'] * 1000:>9.1f} "
+            f"{row['throughput']:>8.2f}"
+        )
+    total = sum(row["count"] for row in rows)
+    print(f"\n{total} requests in {wall_time:.1f}s, {total / wall_time:.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API")
+    parser.add_argument("--users", type=int, default=10, help="concurrent users")
+    parser.add_argument("--iterations", type=int, default=3, help="uploads per user")
+    parser.add_argument(
+        "--accounts",
+        type=int,
+        help="distinct accounts the users log in as, default one per user",
+    )
+    parser.add_argument(
+        "--analysis-latency",
+        type=float,
+        default=1.0,
+        help="seconds the fake analysis takes",
+    )
+    parser.add_argument(
+        "--analysis-jitter", type=float, default=0.0, help="+/- seconds of latency"
+    )
+    parser.add_argument(
+        "--analysis-workers", type=int, default=2, help="jobs analyzed at once"
+    )
+    parser.add_argument(
+        "--grains", type=int, default=200, help="grains per fake analysis"
+    )
+    parser.add_argument(
+        "--image-size", type=int, default=512, help="edge of uploaded images in px"
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=0.5, help="seconds between polls"
+    )
+    parser.add_argument(
+        "--database-url", help="throwaway database to use instead of a new SQLite"
+    )
+    parser.add_argument("--output", help="JSON file to write the results to")
+    args = parser.parse_args()
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    work_dir = Path(tempfile.mkdtemp(prefix="loadtest_"))
+    database_url = args.database_url or f"sqlite:///{work_dir / 'loadtest.db'}"
+    configure(database_url, work_dir)
+
+    # Imports settings, from backend/.env, so only after configure()
+    from core.logging import setup_logging
+
+    setup_logging()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    from main import app
+
+    emails = prepare_database(args.accounts or args.users)
+    stop = threading.Event()
+    workers = start_workers(
+        args.analysis_workers,
+        FakeAnalyzer(args.analysis_latency, args.analysis_jitter, args.grains),
+        stop,
+    )
+    # Result files are written relative to the working directory
+    os.chdir(work_dir)
+    try:
+        stats, wall_time = asyncio.run(run_load(app, args, emails))
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+        os.chdir(BACKEND_DIR)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    rows = stats.report(wall_time)
+    print_report(rows, wall_time)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "created_at": datetime.now(timezone.utc).isoformat(),
+                        "database": database_url.split(":", 1)[0],
+                        "args": vars(args),
+                        "wall_time": wall_time,
+                    },
+                    "results": rows,
+                },
+                f,
+                indent=2,
+            )
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
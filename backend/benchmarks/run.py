@@ -0,0 +1,291 @@
+# benchmarks/run.py
+"""
+Benchmarks of the analysis pipeline on synthetic grain images.
+
+Run from backend/, no model checkpoints needed:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --cases 1k --repeat 5 --compare results.json
+
+Each case generates an image with known grains (see benchmarks/synthetic.py)
+and times the functions of core/interactions.py one by one. The Unet and
+SAM stages run with the stub models of benchmarks/stubs.py, so they measure
+the code around the models rather than the inference itself. Results are
+written as JSON; with --compare, medians are checked against an earlier
+file and the exit status is 1 if anything got slower than --threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.stubs import StubPredictor, StubUnet
+from benchmarks.synthetic import make_grain_image
+from core import artifacts, segmentation
+from core import interactions as si
+from core.grain_analysis import ANALYSIS_PARAMS
+from core.progress import ProgressTracker
+
+# name: (grains, megapixels)
+CASES = {
+    "1k": (1000, 2),
+    "5k": (5000, 20),
+    "20k": (20000, 100),
+}
+
+
+def time_calls(fn, repeat: int) -> list[float]:
+    """Wall time of `repeat` calls of fn, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def interaction_benchmarks(image, polygons, tmp_dir: Path, sample, raster_sample):
+    """
+    (name, function, items) of the core/interactions.py benchmarks.
+
+    Grain-by-grain functions run on the first `sample` grains only, and
+    raster measurement, which rasterizes the whole image per grain, on the
+    first `raster_sample`.
+    """
+    grains = si.polygons_to_grains(polygons, image)
+    collection = si.GrainCollection.from_polygons(polygons, image=image)
+    collection.measure()
+    spacing = max(int(np.sqrt(image.shape[0] * image.shape[1] / len(polygons))), 1)
+    points, _, _ = si.make_grid(image, spacing)
+    n = len(polygons)
+
+    return [
+        ("polygons_to_grains", lambda: si.polygons_to_grains(polygons, image), n),
+        (
+            "GrainCollection.from_polygons",
+            lambda: si.GrainCollection.from_polygons(polygons, image=image),
+            n,
+        ),
+        (
+            "Grain.measure[vector]",
+            lambda: [g.measure() for g in grains[:sample]],
+            min(sample, n),
+        ),
+        (
+            "Grain.measure[raster]",
+            lambda: [g.measure(raster=True) for g in grains[:raster_sample]],
+            min(raster_sample, n),
+        ),
+        ("GrainCollection.measure", lambda: collection.measure(), n),
+        (
+            "GrainCollection.measure[labeled_color]",
+            lambda: collection.measure(labeled_color=True),
+            n,
+        ),
+        (
+            "measure_color",
+            lambda: [si.measure_color(image, p) for p in polygons[:sample]],
+            min(sample, n),
+        ),
+        ("measure_colors", lambda: si.measure_colors(image, polygons), n),
+        (
+            "get_summary",
+            lambda: si.get_summary(collection, ANALYSIS_PARAMS["px_per_m"]),
+            n,
+        ),
+        ("get_mask", lambda: si.get_mask(collection, image), n),
+        (
+            "save_grains",
+            lambda: si.save_grains(tmp_dir / "grains.geojson", collection),
+            n,
+        ),
+        (
+            "filter_grains_by_points",
+            lambda: si.filter_grains_by_points(grains, points),
+            len(points),
+        ),
+    ]
+
+
+def model_benchmarks(image, polygons, tmp_dir: Path, stage_timings: dict):
+    """
+    (name, function, items) of the model-dependent stages, with stub models.
+
+    Per-stage timings of the last segmentation run are put in stage_timings.
+    """
+    unet, predictor = StubUnet(), StubPredictor()
+    collection = si.GrainCollection.from_polygons(polygons, image=image)
+    collection.measure()
+    summary = si.get_summary(collection, ANALYSIS_PARAMS["px_per_m"])
+    n = len(polygons)
+
+    def segment():
+        tracker = ProgressTracker(lambda *args: None, interval=float("inf"))
+        segmentation.predict_large_image(
+            image,
+            unet,
+            predictor,
+            min_area=ANALYSIS_PARAMS["min_area"],
+            patch_size=ANALYSIS_PARAMS["patch_size"],
+            overlap=ANALYSIS_PARAMS["overlap"],
+            batch_size=16,
+            progress=tracker,
+        )
+        tracker.finish()
+        stage_timings.clear()
+        stage_timings.update(tracker.timings)
+
+    def write():
+        artifacts.write_artifacts(
+            tmp_dir / "document", image, collection, summary, eager=True
+        )
+
+    return [
+        ("segmentation.predict_large_image", segment, n),
+        ("artifacts.write_artifacts", write, n),
+    ]
+
+
+def run_case(case: str, args) -> list[dict]:
+    n_grains, megapixels = CASES[case]
+    print(f"Generating {n_grains} grains on {megapixels}MP", flush=True)
+    image, polygons = make_grain_image(n_grains, megapixels, seed=args.seed)
+
+    results = []
+    stage_timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        benchmarks = interaction_benchmarks(
+            image, polygons, tmp_dir, args.sample, args.raster_sample
+        )
+        if not args.no_models:
+            benchmarks += model_benchmarks(image, polygons, tmp_dir, stage_timings)
+
+        for name, fn, items in benchmarks:
+            times = time_calls(fn, args.repeat)
+            median = statistics.median(times)
+            result = {
+                "case": case,
+                "grains": n_grains,
+                "megapixels": megapixels,
+                "name": name,
+                "items": items,
+                "repeat": args.repeat,
+                "min": min(times),
+                "median": median,
+                "mean": statistics.fmean(times),
+                "per_item": median / items if items else None,
+            }
+            if name == "segmentation.predict_large_image":
+                result["stages"] = dict(stage_timings)
+            results.append(result)
+            print(f"{case:>5} {name:<42} {median * 1000:12.1f} ms", flush=True)
+    return results
+
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "args": vars(args),
+    }
+
+
+def load_baseline(path: str) -> dict:
+    with open(path) as f:
+        return {(r["case"], r["name"]): r for r in json.load(f)["results"]}
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list:
+    """Print median ratios against earlier results, return the regressions."""
+    regressions = []
+    print("\nCompared to baseline:")
+    for result in results:
+        before = baseline.get((result["case"], result["name"]))
+        if before is None:
+            continue
+        ratio = result["median"] / before["median"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  SLOWER"
+            regressions.append((result["case"], result["name"], ratio))
+        print(f"{result['case']:>5} {result['name']:<42} {ratio:8.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline")
+    parser.add_argument(
+        "--cases",
+        default=",".join(CASES),
+        help=f"comma separated cases to run, of {', '.join(CASES)}",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark")
+    parser.add_argument(
+        "--sample", type=int, default=200, help="grains for per-grain benchmarks"
+    )
+    parser.add_argument(
+        "--raster-sample",
+        type=int,
+        default=20,
+        help="grains for raster measurement, which is much slower",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="synthetic image seed")
+    parser.add_argument(
+        "--no-models", action="store_true", help="skip the stub model stages"
+    )
+    parser.add_argument(
+        "--output", default="benchmark_results.json", help="JSON file to write"
+    )
+    parser.add_argument("--compare", help="earlier JSON results to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="median ratio above which --compare reports a regression",
+    )
+    args = parser.parse_args()
+
+    cases = [case.strip() for case in args.cases.split(",")]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    # Read first, the baseline may be overwritten by --output
+    baseline = load_baseline(args.compare) if args.compare else None
+
+    results = []
+    for case in cases:
+        results += run_case(case, args)
+
+    with open(args.output, "w") as f:
+        json.dump({"meta": metadata(args), "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if baseline is not None and compare(results, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
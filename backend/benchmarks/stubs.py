@@ -0,0 +1,71 @@
+# benchmarks/stubs.py
+import numpy as np
+import skimage
+import torch
+
+from benchmarks.synthetic import BACKGROUND_RANGE, BOUNDARY_VALUE, GRAIN_RANGE
+
+# Brightness thresholds between the pixel classes of the synthetic images
+_PADDING_MAX = BOUNDARY_VALUE // 2
+_BOUNDARY_MAX = (BOUNDARY_VALUE + BACKGROUND_RANGE[0]) // 2
+_GRAIN_MIN = (BACKGROUND_RANGE[1] + GRAIN_RANGE[0]) // 2
+
+
+def _grain_pixels(image: np.ndarray) -> np.ndarray:
+    return np.asarray(image).mean(axis=-1) >= _GRAIN_MIN
+
+
+class StubUnet:
+    """
+    Stands in for the Unet model on synthetic images, without weights.
+
+    Classifies pixels by brightness into background, grain and grain
+    boundary, in the channel order segmenteverygrain expects. Costs a
+    fraction of a real inference, so model stages measure the code around
+    the models.
+    """
+
+    def predict(self, x: np.ndarray, verbose: int = 0) -> np.ndarray:
+        gray = np.asarray(x, dtype=np.float32).mean(axis=-1)
+        classes = np.zeros(gray.shape, dtype=np.intp)
+        classes[gray >= _GRAIN_MIN] = 1
+        # Zero padding added by predict_image stays background
+        classes[(gray > _PADDING_MAX) & (gray < _BOUNDARY_MAX)] = 2
+        pred = np.full(gray.shape + (3,), 0.05, dtype=np.float32)
+        np.put_along_axis(pred, classes[..., None], 0.9, axis=-1)
+        return pred
+
+
+class _IdentityTransform:
+    def apply_coords(self, coords: np.ndarray, original_size) -> np.ndarray:
+        return coords
+
+
+class StubPredictor:
+    """
+    Stands in for segment_anything.SamPredictor on synthetic images.
+
+    set_image() labels the grains of the image, in place of computing its
+    embedding, and each point prompt is answered with the mask of the grain
+    under it. Masks have the same shape and type as SAM's, so the batched
+    decoding in core/segmentation.py does the same work.
+    """
+
+    device = "cpu"
+    transform = _IdentityTransform()
+
+    def set_image(self, image: np.ndarray):
+        self.original_size = image.shape[:2]
+        self._labels = skimage.measure.label(_grain_pixels(image), connectivity=1)
+
+    def predict_torch(self, point_coords, point_labels, multimask_output=True):
+        height, width = self._labels.shape
+        points = point_coords[:, 0, :].numpy().round().astype(int)
+        x = points[:, 0].clip(0, width - 1)
+        y = points[:, 1].clip(0, height - 1)
+        ids = self._labels[y, x]
+        masks = (self._labels[None] == ids[:, None, None]) & (ids > 0)[:, None, None]
+        # SAM proposes three masks per prompt, same one here
+        masks = torch.from_numpy(masks)[:, None].expand(-1, 3, -1, -1)
+        scores = torch.tensor([[0.9, 0.8, 0.7]]).expand(len(ids), -1)
+        return masks, scores, None
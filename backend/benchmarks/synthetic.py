@@ -0,0 +1,114 @@
+# benchmarks/synthetic.py
+import numpy as np
+import rasterio.features
+import shapely
+
+# Pixel values of the synthetic images, also used by the stub models to
+# "segment" them (see benchmarks/stubs.py)
+BACKGROUND_RANGE = (40, 80)
+BOUNDARY_VALUE = 15
+GRAIN_RANGE = (120, 230)
+
+# Vertices per synthetic grain outline
+GRAIN_VERTICES = 32
+
+
+def image_shape(megapixels: float, aspect: float = 1.5) -> tuple[int, int]:
+    """(height, width) of an image with about this many megapixels."""
+    width = int(round(np.sqrt(megapixels * 1e6 * aspect)))
+    height = int(round(megapixels * 1e6 / width))
+    return height, width
+
+
+def make_polygons(n_grains: int, shape: tuple, seed: int = 0) -> list:
+    """
+    Non-overlapping, irregular elliptical grains scattered over an image.
+
+    Each grain sits in its own cell of a grid covering the image, so they
+    never overlap, and is star-shaped around its center, so it is always a
+    valid polygon.
+
+    Parameters
+    ----------
+    n_grains : int
+        Number of grains.
+    shape : tuple
+        (height, width) of the image.
+    seed : int, default 0
+        Seed of the random generator, the same seed gives the same grains.
+
+    Returns
+    -------
+    list
+        Grain outlines as shapely.Polygon, in pixel coordinates.
+    """
+    rng = np.random.default_rng(seed)
+    height, width = shape
+    cols = int(np.ceil(np.sqrt(n_grains * width / height)))
+    rows = int(np.ceil(n_grains / cols))
+    cell_w, cell_h = width / cols, height / rows
+    cells = rng.choice(rows * cols, size=n_grains, replace=False)
+
+    cx = (cells % cols + 0.5 + rng.uniform(-0.1, 0.1, n_grains)) * cell_w
+    cy = (cells // cols + 0.5 + rng.uniform(-0.1, 0.1, n_grains)) * cell_h
+    a = rng.uniform(0.3, 0.42, n_grains) * min(cell_w, cell_h)
+    b = a * rng.uniform(0.5, 1.0, n_grains)
+    rotation = rng.uniform(0, np.pi, n_grains)
+
+    t = np.linspace(0, 2 * np.pi, GRAIN_VERTICES, endpoint=False)
+    noise = rng.uniform(0.92, 1.08, (n_grains, GRAIN_VERTICES))
+    ex = a[:, None] * np.cos(t) * noise
+    ey = b[:, None] * np.sin(t) * noise
+    cos, sin = np.cos(rotation)[:, None], np.sin(rotation)[:, None]
+    coords = np.stack(
+        (cx[:, None] + ex * cos - ey * sin, cy[:, None] + ex * sin + ey * cos),
+        axis=-1,
+    )
+    return list(shapely.polygons(coords))
+
+
+def make_image(shape: tuple, polygons: list, seed: int = 0) -> np.ndarray:
+    """
+    RGB image of grains on a noisy background.
+
+    Every grain gets its own flat color, with a dark outline, so a simple
+    brightness threshold tells background, grain and boundary apart.
+    """
+    rng = np.random.default_rng(seed)
+    height, width = shape
+    image = rng.integers(*BACKGROUND_RANGE, size=(height, width, 3), dtype=np.uint8)
+
+    dtype = np.uint16 if len(polygons) < 2**16 - 1 else np.uint32
+    labels = rasterio.features.rasterize(
+        ((p, i) for i, p in enumerate(polygons, start=1)),
+        out_shape=shape,
+        dtype=dtype,
+    )
+    palette = rng.integers(*GRAIN_RANGE, size=(len(polygons) + 1, 3), dtype=np.uint8)
+    inside = labels > 0
+    image[inside] = palette[labels[inside]]
+    del labels, inside
+
+    outlines = rasterio.features.rasterize(
+        (p.exterior for p in polygons), out_shape=shape, dtype=np.uint8
+    )
+    image[outlines > 0] = BOUNDARY_VALUE
+    return image
+
+
+def make_grain_image(
+    n_grains: int, megapixels: float, seed: int = 0
+) -> tuple[np.ndarray, list]:
+    """
+    Synthetic image with known grains, see make_polygons() and make_image().
+
+    Returns
+    -------
+    image : np.ndarray
+        RGB image, uint8.
+    polygons : list
+        Grain outlines as shapely.Polygon.
+    """
+    shape = image_shape(megapixels)
+    polygons = make_polygons(n_grains, shape, seed)
+    return make_image(shape, polygons, seed), polygons
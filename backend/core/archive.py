@@ -0,0 +1,203 @@
+# core/archive.py
+import io
+import logging
+import os
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator
+
+CHUNK_SIZE = 1024 * 1024
+
+# Result files of a document and their names inside its archive
+RESULT_ARCHIVE_NAMES = {
+    "_grains.jpg": "_grains.jpg",
+    "_grains.geojson": "_grains.geojson",
+    "_summary.csv": "_summary.csv",
+    "_summary.jpg": "_histogram.jpg",
+    "_mask.png": "_mask.png",
+    "_mask2.jpg": "_mask_preview.jpg",
+}
+
+# Cached archive of all result files, next to them
+ARCHIVE_SUFFIX = "_results.zip"
+
+# Already compressed, deflating them again costs CPU for no gain
+STORED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".zip", ".gz"}
+
+
+class _ChunkWriter(io.RawIOBase):
+    """
+    Write-only, non-seekable file that collects what zipfile writes until it
+    is drained. zipfile falls back to data descriptors on such files, so the
+    archive never needs to be seeked or held in memory.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.buffer += b
+        return len(b)
+
+    def drain(self) -> bytes:
+        chunk = bytes(self.buffer)
+        self.buffer.clear()
+        return chunk
+
+
+def zip_member(arcname: str, mtime: float = None) -> zipfile.ZipInfo:
+    """ZipInfo for a file, stored or deflated depending on its type."""
+    info = zipfile.ZipInfo(arcname, time.localtime(mtime)[:6])
+    if Path(arcname).suffix.lower() in STORED_EXTENSIONS:
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def iter_zip(members: Iterable) -> Iterator[bytes]:
+    """
+    Stream a ZIP archive chunk by chunk.
+
+    Parameters
+    ----------
+    members : iterable of (source, arcname)
+        Files to add. source is a path, or the file's content as bytes.
+
+    Yields
+    ------
+    bytes
+        Consecutive pieces of the archive, at most about CHUNK_SIZE each.
+    """
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, "w", allowZip64=True) as zf:
+        for source, arcname in members:
+            if isinstance(source, bytes):
+                zf.writestr(zip_member(arcname), source)
+                yield writer.drain()
+                continue
+
+            info = zip_member(arcname, os.path.getmtime(source))
+            with (
+                open(source, "rb") as f,
+                zf.open(info, "w", force_zip64=True) as dest,
+            ):
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    dest.write(chunk)
+                    if writer.buffer:
+                        yield writer.drain()
+            yield writer.drain()
+    yield writer.drain()
+
+
+def iter_zip_cached(members: Iterable, cache_path) -> Iterator[bytes]:
+    """
+    Stream a ZIP archive like iter_zip() while also saving it to cache_path.
+
+    The copy is moved into place only once the whole archive was sent, so an
+    interrupted download never leaves a truncated archive behind.
+    """
+    cache_path = Path(cache_path)
+    tmp = cache_path.with_name(f".{uuid.uuid4().hex}{cache_path.suffix}")
+    try:
+        with open(tmp, "wb") as f:
+            for chunk in iter_zip(members):
+                if chunk:
+                    f.write(chunk)
+                    yield chunk
+        os.replace(tmp, cache_path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+            logging.info(f"Discarded incomplete archive {cache_path}")
+
+
+def prefetch(members: Iterable, workers: int = 8) -> Iterator[tuple]:
+    """
+    Read archive members ahead on a thread pool, keeping their order.
+
+    At most `workers` files are in flight or waiting at once, so memory stays
+    bounded however many members there are. Files that disappeared are
+    skipped.
+
+    Yields
+    ------
+    (bytes, arcname)
+        Member content, ready for iter_zip().
+    """
+
+    def read(member):
+        source, arcname = member
+        if isinstance(source, bytes):
+            return source, arcname
+        try:
+            return Path(source).read_bytes(), arcname
+        except FileNotFoundError:
+            logging.warning(f"Skipping missing archive member {source}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for member in members:
+            pending.append(pool.submit(read, member))
+            if len(pending) >= workers:
+                result = pending.popleft().result()
+                if result is not None:
+                    yield result
+        while pending:
+            result = pending.popleft().result()
+            if result is not None:
+                yield result
+
+
+def result_members(output_prefix: str, base_name: str, folder: str = "") -> list:
+    """
+    Archive members for the result files of one document that exist.
+
+    Parameters
+    ----------
+    output_prefix : str
+        Path prefix of the result files.
+    base_name : str
+        Name the files are given in the archive, usually the uploaded file's
+        name without extension.
+    folder : str (optional)
+        Folder to put the files in, inside the archive.
+
+    Returns
+    -------
+    list of (path, arcname)
+    """
+    output_prefix = Path(output_prefix)
+    members = []
+    for suffix, name in RESULT_ARCHIVE_NAMES.items():
+        path = output_prefix.parent / f"{output_prefix.name}{suffix}"
+        if path.exists():
+            members.append((path, f"{folder}{base_name}{name}"))
+    return members
+
+
+def is_complete(members: list) -> bool:
+    """
+    Whether result_members() found every result file. Only complete archives
+    are cached, a missing file could still be rendered later.
+    """
+    return len(members) == len(RESULT_ARCHIVE_NAMES)
+
+
+def discard_archive(output_prefix: str):
+    """Remove the cached archive of a document, its result files changed."""
+    Path(f"{output_prefix}{ARCHIVE_SUFFIX}").unlink(missing_ok=True)
+
+
+def build_zip(members: Iterable, path):
+    """Write a ZIP archive to disk, atomically."""
+    for _ in iter_zip_cached(members, path):
+        pass
@@ -0,0 +1,242 @@
+# core/artifacts.py
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import segmenteverygrain as seg
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+from PIL import Image
+
+from core import interactions as si
+from core.config import settings
+from core.progress import no_progress
+
+logger = logging.getLogger(__name__)
+
+# Written by every analysis, everything else can be derived from these
+CANONICAL_SUFFIXES = ("_grains.geojson", "_summary.csv")
+
+# Rendered from the canonical files and the original image, by the analysis
+# with EAGER_ARTIFACTS or else on first download
+DERIVED_SUFFIXES = ("_grains.jpg", "_summary.jpg", "_mask.png", "_mask2.jpg")
+
+# Need a full-size raster, so they aren't made for images analyzed in tiles
+FULL_IMAGE_SUFFIXES = ("_grains.jpg", "_mask.png", "_mask2.jpg")
+
+# Locks striped by file, so concurrent requests render a file only once.
+# A fixed set, files sharing one only wait for each other.
+_render_locks = [threading.Lock() for _ in range(64)]
+
+# segmenteverygrain draws histograms through pyplot's global state, which
+# isn't thread-safe. Everything else uses its own Figure.
+_pyplot_lock = threading.Lock()
+
+
+def save_overlay(fn, image: np.ndarray, polygons: list):
+    """
+    Save the image with grains drawn over it, without touching pyplot.
+
+    Draws what seg.plot_image_w_colorful_grains() does, which goes through
+    pyplot's current figure: each grain filled with a random color of the
+    tab20b colormap, outlined in black.
+    """
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.imshow(image)
+
+    n = len(polygons)
+    colors = matplotlib.colormaps["tab20b"](np.random.permutation(n) / max(n, 1))
+    outlines = [np.asarray(p.exterior.coords) for p in polygons]
+    ax.add_collection(
+        PolyCollection(outlines, facecolors=colors, edgecolors="none", alpha=0.4)
+    )
+    ax.add_collection(PolyCollection(outlines, facecolors="none", edgecolors="k"))
+    ax.set_xlim([0, image.shape[1]])
+    ax.set_ylim([image.shape[0], 0])
+    fig.tight_layout()
+    fig.savefig(fn, dpi=150, bbox_inches="tight")
+
+
+def save_histogram(fn, summary: pd.DataFrame):
+    with _pyplot_lock:
+        si.save_histogram(fn, summary=summary)
+
+
+def write_artifacts(
+    output_prefix: str,
+    image: np.ndarray,
+    grains: si.GrainCollection,
+    summary: pd.DataFrame,
+    eager: bool = True,
+    overlay: bool = True,
+    max_workers: int = 4,
+    progress=no_progress,
+):
+    """
+    Write the result files of one analysis concurrently.
+
+    The labeled mask is rasterized once and shared by both mask files. The
+    outputs don't depend on each other, so they are written on a thread pool;
+    rasterization, JPEG/PNG encoding and file writes release the GIL.
+
+    Parameters
+    ----------
+    output_prefix : str
+        Path prefix of the result files.
+    image : np.ndarray
+        Analyzed image.
+    grains : GrainCollection
+        Detected grains.
+    summary : pd.DataFrame
+        Grain summary from interactions.get_summary().
+    eager : bool, default True
+        Whether to render the derived images now. If False only the GeoJSON
+        and summary CSV are written, see render().
+    overlay : bool, default True
+        Whether to render the grain overlay (_grains.jpg), the slowest file.
+    max_workers : int, default 4
+        Size of the thread pool.
+    progress : callable (optional)
+        Progress callback, see core.progress. Reports "writing" per finished
+        file and the time each file took, as "writing <suffix>".
+    """
+    output_prefix = Path(output_prefix)
+    output_prefix.parent.mkdir(parents=True, exist_ok=True)
+
+    def path(suffix):
+        return output_prefix.parent / f"{output_prefix.name}{suffix}"
+
+    # Build the shared polygons once, before threads race to do it
+    polygons = grains.polygons
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+
+        def submit(suffix, fn, *args, **kwargs):
+            def timed():
+                start = time.perf_counter()
+                fn(path(suffix), *args, **kwargs)
+                return time.perf_counter() - start
+
+            futures[pool.submit(timed)] = suffix
+
+        submit("_grains.geojson", si.save_grains, grains)
+        submit("_summary.csv", summary.to_csv)
+        if eager:
+            # Submitted before its users, so they only ever wait on a running task
+            mask = pool.submit(si.get_mask, grains, image)
+            submit("_summary.jpg", save_histogram, summary)
+            for suffix, scale in (("_mask.png", False), ("_mask2.jpg", True)):
+                submit(
+                    suffix,
+                    lambda fn, scale=scale: si.save_mask(
+                        fn, grains, image, scale=scale, mask=mask.result()
+                    ),
+                )
+            if overlay:
+                submit("_grains.jpg", save_overlay, image, polygons)
+            else:
+                logger.info("Skipping grain overlay")
+
+        # Reported from this thread, so callbacks needn't be thread-safe.
+        # Raises the first error; the pool still waits for the other writers.
+        progress("writing", 0, len(futures))
+        for done, future in enumerate(as_completed(futures), start=1):
+            progress(f"writing {futures[future]}", seconds=future.result())
+            progress("writing", done, len(futures))
+
+
+def render(output_prefix: str, suffix: str, image_path: str) -> Optional[Path]:
+    """
+    Return a result file, rendering it from the canonical files if missing.
+
+    The file is written under a temporary name and moved into place, so
+    readers never see a partial file and cached results linked into the
+    output directory are never modified.
+
+    Parameters
+    ----------
+    output_prefix : str
+        Path prefix of the result files.
+    suffix : str
+        Result file to get, e.g. "_mask.png".
+    image_path : str
+        Analyzed image, needed for the overlay and mask dimensions.
+
+    Returns
+    -------
+    Path or None
+        Path of the file, or None if it doesn't exist and can't be derived.
+    """
+    output_prefix = Path(output_prefix)
+    path = output_prefix.parent / f"{output_prefix.name}{suffix}"
+    if path.exists():
+        return path
+    if suffix not in DERIVED_SUFFIXES or not all(
+        (output_prefix.parent / f"{output_prefix.name}{s}").exists()
+        for s in CANONICAL_SUFFIXES
+    ):
+        return None
+    if suffix in FULL_IMAGE_SUFFIXES:
+        width, height = Image.open(image_path).size
+        if width * height >= settings.STREAMING_MIN_PIXELS:
+            return None
+
+    with _render_locks[hash(path) % len(_render_locks)]:
+        # Rendered by another request while we waited
+        if path.exists():
+            return path
+        # Keep the extension, savefig and save_img infer the format from it
+        tmp = path.with_name(f".{uuid.uuid4().hex}{path.suffix}")
+        try:
+            _RENDERERS[suffix](tmp, output_prefix, image_path)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+    logger.info(f"Rendered {path}")
+    return path
+
+
+def _load_grains(output_prefix: Path) -> si.GrainCollection:
+    polygons = seg.read_polygons(
+        output_prefix.parent / f"{output_prefix.name}_grains.geojson"
+    )
+    return si.GrainCollection.from_polygons(polygons)
+
+
+def _render_overlay(fn, output_prefix: Path, image_path: str):
+    image = np.asarray(Image.open(image_path).convert("RGB"))
+    save_overlay(fn, image, _load_grains(output_prefix).polygons)
+
+
+def _render_histogram(fn, output_prefix: Path, image_path: str):
+    summary = pd.read_csv(
+        output_prefix.parent / f"{output_prefix.name}_summary.csv", index_col=0
+    )
+    save_histogram(fn, summary)
+
+
+def _render_mask(fn, output_prefix: Path, image_path: str, scale: bool):
+    # Rasterizing only needs the image dimensions, read from the header
+    width, height = Image.open(image_path).size
+    image = np.broadcast_to(np.uint8(0), (height, width, 3))
+    si.save_mask(fn, _load_grains(output_prefix), image, scale=scale)
+
+
+_RENDERERS = {
+    "_grains.jpg": _render_overlay,
+    "_summary.jpg": _render_histogram,
+    "_mask.png": lambda *args: _render_mask(*args, scale=False),
+    "_mask2.jpg": lambda *args: _render_mask(*args, scale=True),
+}
@@ -23,12 +23,82 @@ class Settings(BaseSettings):
 
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    AUTH_CACHE_TTL_SECONDS: int = 30  # how long an authenticated user is cached
+
+    # Status/role lookup cache, 0 keeps it until a name is missing
+    LOOKUP_CACHE_TTL_SECONDS: int = 0
+
     # File Upload Configuration
     UPLOAD_DIR: str = "uploads/documents"
 
     MAX_FILE_SIZE: int = 10485760  # 10MB in bytes
 
-    ALLOWED_EXTENSIONS: str = ".pdf,.doc,.docx,.txt,.png,.jpg,.jpeg"
+    ALLOWED_EXTENSIONS: str = ".pdf,.doc,.docx,.txt,.png,.jpg,.jpeg,.tif,.tiff"
+
+    UPLOAD_CHUNK_SIZE: int = 8388608  # 8MB per resumable upload chunk
+
+    RESUMABLE_UPLOAD_MAX_SIZE: int = 10737418240  # 10GB, chunked uploads only
+
+    UPLOAD_SESSION_EXPIRE_HOURS: int = 24  # unfinished sessions are then removed
+
+    BULK_UPLOAD_MAX_FILES: int = 500
+
+    BULK_UPLOAD_MAX_BYTES: int = 2147483648  # 2GB of files per upload, unzipped
+
+    # Analysis Worker Configuration
+    ANALYSIS_WORKERS: int = 1
+
+    WORKER_POLL_INTERVAL: float = 2.0  # seconds between empty queue polls
+
+    JOB_STALE_AFTER: int = 3600  # seconds without heartbeat before a job is requeued
+
+    JOB_HEARTBEAT_INTERVAL: int = 60  # seconds between heartbeats of a running job
+
+    JOB_REQUEUE_INTERVAL: int = 60  # seconds between checks for stale jobs
+
+    JOB_MAX_ATTEMPTS: int = 3
+
+    PROGRESS_REPORT_INTERVAL: float = 2.0  # min seconds between progress writes
+
+    WORKER_METRICS_PORT: int = 9101  # worker pool /metrics, 0 to disable
+
+    METRICS_DIR: str = "storage/metrics"  # shared by worker processes' metrics
+
+    # Grain Analysis Configuration
+    SAM_BATCH_SIZE: int = 16  # point prompts per SAM mask decoder call
+
+    STREAMING_MIN_PIXELS: int = 100000000  # larger images are processed in tiles
+
+    STREAMING_TILE_SIZE: int = 4096  # tile edge length in pixels
+
+    STREAMING_TILE_HALO: int = 256  # context around each tile, above max grain size
+
+    LABELED_COLOR: bool = False  # faster grain colors from one labeled raster
+
+    EAGER_ARTIFACTS: bool = False  # render images during analysis, not on download
+
+    ANALYSIS_OVERLAY: bool = True  # render the _grains.jpg overlay when eager
+
+    ARTIFACT_WORKERS: int = 4  # threads writing result files
+
+    # Download Configuration
+    BATCH_DOWNLOAD_MAX_DOCUMENTS: int = 500
+
+    ARCHIVE_READ_WORKERS: int = 8  # files read ahead while building archives
+
+    # Status Events Configuration
+    SSE_POLL_INTERVAL: float = 1.0  # seconds between status checks, shared by streams
+
+    SSE_KEEPALIVE_INTERVAL: float = 15.0  # idle seconds before a keepalive comment
+
+    # Result Cache Configuration
+    RESULT_CACHE_ENABLED: bool = True
+
+    RESULT_CACHE_DIR: str = "storage/cache"
+
+    RESULT_CACHE_MAX_BYTES: int = 5368709120  # 5GB in bytes
+
+    RESULT_CACHE_EVICT_INTERVAL: int = 300  # min seconds between eviction scans
 
     def __init__(self, **values):
         super().__init__(**values)
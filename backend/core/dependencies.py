@@ -1,23 +1,91 @@
-from fastapi import Depends, HTTPException, status
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import joinedload
 
+from core import lookups
+from core.config import settings
 from core.security import decode_access_token
-from db.database import get_db
-from models.role import Role
+from db.database import SessionLocal
 from models.user import User
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """Get current authenticated user"""
-    token = credentials.credentials
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user, as needed by request handlers."""
+
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    role_id: int
+    role_name: Optional[str]
+    status_id: int
+
+
+# user id -> (loaded at, Principal), shared by the requests of this process
+_principals: dict[int, tuple[float, Principal]] = {}
+_principals_lock = threading.Lock()
+
+
+def invalidate_principal(user_id: int):
+    """
+    Forget a cached user after it changed. Other processes pick up the change
+    once their entry expires, after AUTH_CACHE_TTL_SECONDS.
+    """
+    with _principals_lock:
+        _principals.pop(user_id, None)
+
+
+def _load_principal(user_id: int) -> Optional[Principal]:
+    db = SessionLocal()
+    try:
+        user = (
+            db.query(User)
+            .options(joinedload(User.role))
+            .filter(User.id == user_id)
+            .first()
+        )
+        if user is None:
+            return None
+        return Principal(
+            id=user.id,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            email=user.email,
+            role_id=user.role_id,
+            role_name=user.role.name if user.role else None,
+            status_id=user.status_id,
+        )
+    finally:
+        db.close()
+
+
+def get_principal(user_id: int) -> Optional[Principal]:
+    """Cached user, loaded from the database at most every TTL seconds."""
+    now = time.monotonic()
+    cached = _principals.get(user_id)
+    if cached is not None and now - cached[0] < settings.AUTH_CACHE_TTL_SECONDS:
+        return cached[1]
 
+    principal = _load_principal(user_id)
+    with _principals_lock:
+        if principal is None:
+            _principals.pop(user_id, None)
+        else:
+            _principals[user_id] = (now, principal)
+    return principal
+
+
+def authenticate(token: str) -> Principal:
+    """Get the user a bearer token belongs to, raising 401 if it's invalid"""
     # Decode token
     payload = decode_access_token(token)
     if payload is None:
@@ -28,7 +96,7 @@ def get_current_user(
         )
 
     # Get user ID
-    user_id: int = payload.get("sub")
+    user_id = payload.get("sub")
     if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,10 +104,8 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Query user from database
-    user = (
-        db.query(User).options(joinedload(User.role)).filter(User.id == user_id).first()
-    )
+    # Usually served from the cache, without a database query
+    user = get_principal(int(user_id))
 
     if user is None:
         raise HTTPException(
@@ -48,23 +114,59 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Tokens issued before the user's role or status changed are retired
+    for claim in ("role_id", "status_id"):
+        if claim in payload and payload[claim] != getattr(user, claim):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token is outdated, please log in again",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
     return user
 
 
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> Principal:
+    """Get current authenticated user"""
+    return authenticate(credentials.credentials)
+
+
+def get_current_user_or_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(
+        HTTPBearer(auto_error=False)
+    ),
+    token: Optional[str] = Query(None),
+) -> Principal:
+    """
+    Get current authenticated user from the Authorization header, or else a
+    `token` query parameter, for clients like EventSource that can't set headers
+    """
+    if credentials is not None:
+        return authenticate(credentials.credentials)
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return authenticate(token)
+
+
 def require_admin(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """Require user to be admin"""
-    # Query admin role from database
-    role_admin = db.query(Role).filter(Role.name == "Admin").first()
-
-    if not role_admin:
+    try:
+        role_admin_id = lookups.roles.id("Admin")
+    except LookupError:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Admin role not found in database",
         )
 
-    if current_user.role_id != role_admin.id:
+    if current_user.role_id != role_admin_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
         )
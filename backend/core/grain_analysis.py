@@ -1,5 +1,7 @@
 # core/grain_analysis.py
 import logging
+import threading
+import time
 from pathlib import Path
 
 import matplotlib
@@ -7,110 +9,152 @@ import numpy as np
 import segmenteverygrain as seg
 from keras.saving import load_model
 from keras.utils import load_img
-from matplotlib import pyplot as plt
 from segment_anything import SamPredictor, sam_model_registry
 
+from core import artifacts, segmentation, streaming
 from core import interactions as si
+from core.config import settings
+from core.progress import no_progress
 
 _analyzer = None
+_analyzer_lock = threading.Lock()
 
 # Get the absolute path of the current file
 BASE_DIR = Path(__file__).resolve().parents[1]
 MODELS_DIR = BASE_DIR / "models"
 STORAGE_DIR = BASE_DIR / "storage"
 
+SEG_MODEL_PATH = MODELS_DIR / "seg_model.keras"
+SAM_CHECKPOINT_PATH = MODELS_DIR / "sam_vit_h_4b8939.pth"
+MODEL_FILES = (SEG_MODEL_PATH, SAM_CHECKPOINT_PATH)
+
+# Parameters that change the analysis output, also part of the result cache key
+ANALYSIS_PARAMS = {
+    "min_area": 400.0,
+    "patch_size": 2000,
+    "overlap": 200,
+    "px_per_m": 1856.6,
+    "streaming_min_pixels": settings.STREAMING_MIN_PIXELS,
+    "streaming_tile_size": settings.STREAMING_TILE_SIZE,
+    "streaming_tile_halo": settings.STREAMING_TILE_HALO,
+    "labeled_color": settings.LABELED_COLOR,
+}
+
 
 class GrainAnalyzer:
     def __init__(self):
         logging.info("Loading grain analysis models...")
         # Load UNET model
         self.unet = load_model(
-            MODELS_DIR / "seg_model.keras",
+            SEG_MODEL_PATH,
             custom_objects={"weighted_crossentropy": seg.weighted_crossentropy},
         )
 
         # Load SAM model
-        self.sam = sam_model_registry["default"](
-            checkpoint=MODELS_DIR / "sam_vit_h_4b8939.pth"
-        )
+        self.sam = sam_model_registry["default"](checkpoint=SAM_CHECKPOINT_PATH)
         self.predictor = SamPredictor(self.sam)
         logging.info("Grain analysis models loaded.")
 
-    def analyze(self, image_path: str, output_prefix: str):
+    def warm_up(self, size: int = 256):
+        """
+        Run both models once on a tiny blank image, so graph compilation and
+        kernel selection happen now rather than during the first analysis.
+        """
+        image = np.zeros((size, size, 3), dtype=np.uint8)
+        seg.predict_image(image, self.unet, I=256)
+        self.predictor.set_image(image)
+        segmentation.predict_points(self.predictor, np.array([[size // 2, size // 2]]))
+
+    def analyze(self, image_path: str, output_prefix: str, progress=no_progress) -> int:
+        """
+        Segment and measure the grains of an image and write the result files.
+        Returns the number of grains found.
+
+        progress is called as the analysis goes through its stages, see
+        core.progress: "loading", "unet" and "sam" per patch and prompt batch,
+        "merging", "measuring" and "writing" per result file.
+        """
         matplotlib.use("Agg")
 
         # make sure output directory exists
         output_prefix = Path(output_prefix)
         output_prefix.parent.mkdir(parents=True, exist_ok=True)
 
+        # Images too large to hold in memory are processed tile by tile
+        if streaming.image_pixels(image_path) >= settings.STREAMING_MIN_PIXELS:
+            return self.analyze_streaming(image_path, output_prefix, progress)
+
+        progress("loading")
         image = np.array(load_img(image_path))
 
-        all_grains, _, _ = seg.predict_large_image(
-            image_path,
+        all_grains, _ = segmentation.predict_large_image(
+            image,
             self.unet,
-            self.sam,
-            min_area=400.0,
-            patch_size=2000,
-            overlap=200,
-        )
-
-        grains = si.polygons_to_grains(all_grains, image=image)
-        for g in grains:
-            g.measure()
-
-        # Visualization (non-GUI)
-        fig, ax = plt.subplots(figsize=(12, 8))
-        seg.plot_image_w_colorful_grains(
-            image, all_grains, ax, cmap="tab20b", plot_image=True, im_alpha=1.0
+            self.predictor,
+            min_area=ANALYSIS_PARAMS["min_area"],
+            patch_size=ANALYSIS_PARAMS["patch_size"],
+            overlap=ANALYSIS_PARAMS["overlap"],
+            batch_size=settings.SAM_BATCH_SIZE,
+            progress=progress,
         )
 
-        fig.savefig(
-            output_prefix.parent / f"{output_prefix.name}_grains.jpg",
-            dpi=150,
-            bbox_inches="tight",
-        )
-        plt.close(fig)
+        progress("measuring")
+        grains = si.GrainCollection.from_polygons(all_grains, image=image)
+        grains.measure(labeled_color=ANALYSIS_PARAMS["labeled_color"])
 
-        px_per_m = 1856.6
-        summary = si.get_summary(grains, px_per_m)
+        summary = si.get_summary(grains, ANALYSIS_PARAMS["px_per_m"])
 
-        # Save grains geojson
-        si.save_grains(
-            output_prefix.parent / f"{output_prefix.name}_grains.geojson",
-            grains,
-        )
-
-        # Save summary CSV
-        si.save_summary(
-            output_prefix.parent / f"{output_prefix.name}_summary.csv",
-            grains,
-            px_per_m,
-        )
-
-        # Save summary histogram
-        si.save_histogram(
-            output_prefix.parent / f"{output_prefix.name}_summary.jpg",
-            summary=summary,
-        )
-
-        # Save mask
-        si.save_mask(
-            output_prefix.parent / f"{output_prefix.name}_mask.png",
-            grains,
+        artifacts.write_artifacts(
+            output_prefix,
             image,
-            scale=False,
+            grains,
+            summary,
+            eager=settings.EAGER_ARTIFACTS,
+            overlay=settings.ANALYSIS_OVERLAY,
+            max_workers=settings.ARTIFACT_WORKERS,
+            progress=progress,
         )
+        return len(grains)
 
-        si.save_mask(
-            output_prefix.parent / f"{output_prefix.name}_mask2.jpg",
-            grains,
-            image,
-            scale=True,
+    def analyze_streaming(
+        self, image_path: str, output_prefix: str, progress=no_progress
+    ) -> int:
+        logging.info(f"Analyzing {image_path} tile by tile")
+        matplotlib.use("Agg")
+        return streaming.analyze_streaming(
+            image_path,
+            output_prefix,
+            self.unet,
+            self.predictor,
+            min_area=ANALYSIS_PARAMS["min_area"],
+            px_per_m=ANALYSIS_PARAMS["px_per_m"],
+            tile_size=settings.STREAMING_TILE_SIZE,
+            halo=settings.STREAMING_TILE_HALO,
+            patch_size=ANALYSIS_PARAMS["patch_size"],
+            overlap=ANALYSIS_PARAMS["overlap"],
+            batch_size=settings.SAM_BATCH_SIZE,
+            labeled_color=ANALYSIS_PARAMS["labeled_color"],
+            progress=progress,
         )
 
 
 def get_grain_analyzer():
     global _analyzer
     if _analyzer is None:
-        _analyzer = GrainAnalyzer()
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = GrainAnalyzer()
     return _analyzer
+
+
+def warm_up_grain_analyzer() -> GrainAnalyzer:
+    """Load the models and run a warm-up inference, ahead of the first job."""
+    start = time.perf_counter()
+    analyzer = get_grain_analyzer()
+    try:
+        analyzer.warm_up()
+    except Exception as e:
+        # Loaded fine, the first analysis just won't be warm
+        logging.warning(f"Warm-up inference failed: {e}")
+    logging.info(f"Grain analyzer ready after {time.perf_counter() - start:.1f}s")
+    return analyzer
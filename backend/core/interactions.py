@@ -50,14 +50,42 @@ mpatches.Polygon.grain = None
 class Grain(object):
     """Stores data and plot representation for a single grain."""
 
+    __slots__ = (
+        "image",
+        "_xy",
+        "_polygon",
+        "_bounds",
+        "data",
+        "facecolor",
+        "axes",
+        "patch",
+        "selected",
+    )
+
+    # Metrics to calculate {name: dimensionality, for unit conversion}
+    region_props = {
+        "area": 2,
+        "centroid": 0,
+        "major_axis_length": 1,
+        "minor_axis_length": 1,
+        "orientation": 0,
+        "perimeter": 1,
+        "max_intensity": 0,
+        "mean_intensity": 0,
+        "min_intensity": 0,
+    }
+
+    # Display
+    selected_props = {"alpha": 1.0, "facecolor": "gold"}
+
     def __deepcopy__(self, memo: dict):
         """Custom deepcopy. Avoids copying the reference image."""
-        # Create a new Grain instance
+        # Create a new Grain instance (geometry cache is rebuilt on demand)
         new_grain = self.__class__(self.xy.copy())
-        # Copy all attributes except for the image
-        for k, v in self.__dict__.items():
-            if k != "image":
-                setattr(new_grain, k, copy.deepcopy(v, memo))
+        # Copy all attributes except for the image and coordinates
+        for k in self.__slots__:
+            if k not in ("image", "_xy", "_polygon", "_bounds") and hasattr(self, k):
+                setattr(new_grain, k, copy.deepcopy(getattr(self, k), memo))
         return new_grain
 
     def __init__(self, xy: np.ndarray, image: np.ndarray = None):
@@ -72,44 +100,80 @@ class Grain(object):
 
         # Input
         self.image = image
-        self.xy = np.array(xy)
+        self.xy = xy
 
         # Metrics
         self.data = None
-        # Metrics to calculate {name: dimensionality, for unit conversion}
-        self.region_props = {
-            "area": 2,
-            "centroid": 0,
-            "major_axis_length": 1,
-            "minor_axis_length": 1,
-            "orientation": 0,
-            "perimeter": 1,
-            "max_intensity": 0,
-            "mean_intensity": 0,
-            "min_intensity": 0,
-        }
 
         # Display
-        self.default_props = {
-            "alpha": 0.6
-            # facecolor is set when patch is created
-        }
-        self.selected_props = {"alpha": 1.0, "facecolor": "gold"}
+        self.facecolor = None  # set when patch is created
         self.axes = []
         self.patch = None
         self.selected = False
 
+    @property
+    def xy(self) -> np.ndarray:
+        """
+        Grain outline as a (2, N) array of x and y coordinates.
+
+        Assigning new coordinates resets the cached geometry. Modifying the
+        array in place does not, so always assign a new array.
+        """
+        return self._xy
+
+    @xy.setter
+    def xy(self, xy: np.ndarray):
+        self._xy = np.array(xy)
+        self._polygon = None
+        self._bounds = None
+
     @property
     def polygon(self) -> shapely.Polygon:
         """
         Return a shapely.Polygon representing the matplotlib patch.
 
+        The polygon is built once and cached until xy changes.
+
         Returns
         -------
         shapely.Polygon
             Polygon representing the boundaries of this grain.
         """
-        return shapely.Polygon(self.xy.T)
+        if self._polygon is None:
+            self._polygon = shapely.Polygon(self._xy.T)
+        return self._polygon
+
+    @property
+    def bounds(self) -> tuple[float, float, float, float]:
+        """Bounding box of the grain as (xmin, ymin, xmax, ymax), cached."""
+        if self._bounds is None:
+            (xmin, ymin), (xmax, ymax) = self._xy.min(axis=1), self._xy.max(axis=1)
+            self._bounds = (float(xmin), float(ymin), float(xmax), float(ymax))
+        return self._bounds
+
+    @property
+    def prepared_polygon(self) -> shapely.Polygon:
+        """
+        Return the cached polygon, prepared for fast repeated predicates
+        (contains, intersects, ...).
+
+        Returns
+        -------
+        shapely.Polygon
+            Same object as self.polygon, after shapely.prepare().
+        """
+        polygon = self.polygon
+        if not shapely.is_prepared(polygon):
+            shapely.prepare(polygon)
+        return polygon
+
+    @property
+    def default_props(self) -> dict:
+        """Patch properties used when the grain is not selected."""
+        props = {"alpha": 0.6}
+        if self.facecolor is not None:
+            props["facecolor"] = self.facecolor
+        return props
 
     def measure(self, raster: bool = False) -> pd.Series:
         """
@@ -296,12 +360,208 @@ class Grain(object):
         # HACK: Save reference to parent grain within the patch itself
         patch.grain = self
         # Save assigned color (for select/unselect)
-        self.default_props["facecolor"] = patch.get_facecolor()
+        self.facecolor = patch.get_facecolor()
         # Save and return reference to drawn patch
         self.patch = patch
         return patch
 
 
+class GrainCollection(object):
+    """
+    Columnar storage for many grains.
+
+    Outlines are kept in one flat (2, N) coordinate array plus offsets, and
+    measurements in a single typed DataFrame, instead of one Grain object
+    with its own pd.Series per grain. Grain views are created on demand for
+    code that works with individual grains, such as GrainPlot.
+
+    The collection is immutable: build a new one to add or remove grains.
+    """
+
+    def __init__(
+        self,
+        xy: np.ndarray,
+        offsets: np.ndarray,
+        image: np.ndarray = None,
+        data: pd.DataFrame = None,
+    ):
+        """
+        Parameters
+        ----------
+        xy : np.ndarray
+            (2, N) array of x and y coordinates of all grain outlines.
+        offsets : np.ndarray
+            Start of each grain in xy, followed by N, so that grain i spans
+            xy[:, offsets[i]:offsets[i + 1]].
+        image : np.ndarray (optional)
+            Image in which grains were detected. Used to measure color info.
+        data : pd.DataFrame (optional)
+            Measurements, one row per grain, as returned by measure().
+        """
+        self.xy = np.asarray(xy, dtype=float)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.image = image
+        self.data = data
+        self._polygons = None
+
+    @classmethod
+    def from_polygons(
+        cls, polygons: list, image: np.ndarray = None
+    ) -> "GrainCollection":
+        """
+        Build a collection from polygons, skipping the same invalid polygons
+        as polygons_to_grains().
+
+        Parameters
+        ----------
+        polygons : list of shapely.Polygon
+            Polygons defining grain boundaries.
+        image : np.ndarray (optional)
+            Image in which grains were detected.
+
+        Returns
+        -------
+        GrainCollection
+            Collection of the valid polygons, in order.
+        """
+        polygons = np.asarray(polygons, dtype=object)
+        if len(polygons):
+            valid = (
+                shapely.is_geometry(polygons)
+                & ~shapely.is_empty(polygons)
+                & shapely.is_valid(polygons)
+            )
+            rings = shapely.get_exterior_ring(polygons[valid])
+            valid[valid] = shapely.get_num_coordinates(rings) >= 3
+            if not valid.all():
+                logger.warning(f"Skipping {np.sum(~valid)} invalid polygon(s)")
+            polygons = polygons[valid]
+        rings = shapely.get_exterior_ring(polygons)
+        coords, index = shapely.get_coordinates(rings, return_index=True)
+        offsets = np.zeros(len(polygons) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(index, minlength=len(polygons)), out=offsets[1:])
+        collection = cls(coords.T, offsets, image)
+        # From the exterior rings the grains are measured on, holes dropped
+        collection._polygons = shapely.polygons(rings)
+        return collection
+
+    @classmethod
+    def from_grains(cls, grains: list, image: np.ndarray = None) -> "GrainCollection":
+        """
+        Build a collection from Grain objects.
+
+        Parameters
+        ----------
+        grains : list
+            List of grains.
+        image : np.ndarray (optional)
+            Image in which grains were detected.
+
+        Returns
+        -------
+        GrainCollection
+            Collection with the same outlines, in order.
+        """
+        if len(grains) == 0:
+            return cls(np.zeros((2, 0)), np.zeros(1, dtype=np.int64), image)
+        x, y, offsets = ragged_coords(grains)
+        return cls(np.vstack((x, y)), offsets, image)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> Grain:
+        """
+        Grain object for the i-th grain, with a copy of its coordinates and,
+        if measured, of its measurement row.
+        """
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("grain index out of range")
+        grain = Grain(self.xy[:, self.offsets[i] : self.offsets[i + 1]], self.image)
+        if self.data is not None:
+            grain.data = self.data.iloc[i]
+        return grain
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_grains(self) -> list:
+        """
+        Grain views of all grains, e.g. to pass to GrainPlot.
+
+        Returns
+        -------
+        list
+            List of Grain objects.
+        """
+        return list(self)
+
+    @property
+    def polygons(self) -> np.ndarray:
+        """
+        Grain outlines as an array of shapely.Polygon, built once, vectorized.
+        """
+        if self._polygons is None:
+            ring_index = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+            rings = shapely.linearrings(self.xy.T, indices=ring_index)
+            self._polygons = shapely.polygons(rings)
+        return self._polygons
+
+    def measure(
+        self, image: np.ndarray = None, labeled_color: bool = False
+    ) -> pd.DataFrame:
+        """
+        Measure all grains at once and store the result in self.data.
+
+        Parameters
+        ----------
+        image : np.ndarray (optional)
+            Image used to measure color info. Defaults to self.image.
+        labeled_color : bool, default False
+            Whether to measure color from a single labeled raster of all
+            grains (see measure_colors), faster but with slightly different
+            values, or grain by grain as Grain.measure() does (measure_color).
+            Grains left without pixels in the labeled raster, all covered by
+            overlapping grains, are measured grain by grain.
+
+        Returns
+        -------
+        self.data : pd.DataFrame
+            One row per grain, with the same columns as Grain.measure().
+        """
+        image = self.image if image is None else image
+        if len(self) == 0:
+            self.data = pd.DataFrame()
+            return self.data
+        x, y = self.xy
+        metrics = measure_polygons(x, y, self.offsets)
+        data = {
+            "area": metrics["area"],
+            "centroid-0": metrics["centroid"][0],
+            "centroid-1": metrics["centroid"][1],
+            "perimeter": metrics["perimeter"],
+        }
+        data.update(measure_ellipse(metrics))
+        df = pd.DataFrame(data)
+        # Color information (mean, max, min of each channel)
+        if isinstance(image, np.ndarray):
+            if labeled_color:
+                colors = measure_colors(image, self.polygons)
+                # Grains hidden under others in the labeled raster
+                for i in np.flatnonzero(colors.isna().any(axis=1).to_numpy()):
+                    colors.iloc[i] = pd.Series(measure_color(image, self.polygons[i]))
+            else:
+                colors = pd.DataFrame([measure_color(image, p) for p in self.polygons])
+            # Grain.measure() returns one float Series per grain
+            colors = colors.astype(float)
+            df = pd.concat([df, colors], axis=1)
+        self.data = df
+        return df
+
+
 class GrainPlot(object):
     """
     Interactive plot to create, delete, and merge grains.
@@ -405,6 +665,7 @@ class GrainPlot(object):
         self.point_labels = []
         self.created_grains = []
         self.selected_grains = []
+        self.index = None  # GrainIndex, rebuilt on demand after edits
 
         # Plot
         self.blit = blit
@@ -506,7 +767,7 @@ class GrainPlot(object):
             grain.image = image
             grain.measure()
             # Set the grain's color before drawing
-            grain.default_props["facecolor"] = grain_colors[i]
+            grain.facecolor = grain_colors[i]
             grain.draw_patch(self.ax, self.scale, animated=blit)
         if blit:
             self.artists = [self.info, *self.box_selector.artists]
@@ -765,6 +1026,19 @@ class GrainPlot(object):
         """
         return self.grains
 
+    def get_index(self) -> "GrainIndex":
+        """
+        Get a spatial index of the current grains, building it if needed.
+
+        Returns
+        -------
+        index : GrainIndex
+            Index over self.grains.
+        """
+        if self.index is None:
+            self.index = GrainIndex(self.grains)
+        return self.index
+
     # Measurements -----------------------------------------------------------
     def draw_scale_line(self, start, end):
         """
@@ -991,6 +1265,7 @@ class GrainPlot(object):
         new_grain.draw_patch(self.ax, self.scale, animated=self.blit)
         self.grains.append(new_grain)
         self.created_grains.append(new_grain)
+        self.index = None
         # Clear prompts and update background
         self.clear_all()
         if self.blit:
@@ -1006,10 +1281,9 @@ class GrainPlot(object):
                 xmin, xmax, ymin, ymax = (
                     np.asarray(self.box_selector.extents) / self.scale
                 )
-                box = shapely.box(xmin, ymin, xmax, ymax)
-                self.selected_grains = [
-                    g for g in self.grains if box.contains(g.polygon)
-                ]
+                self.selected_grains = self.get_index().grains_in_box(
+                    xmin, ymin, xmax, ymax
+                )
             # Otherwise, exit since no grains have been indicated for deletion
             else:
                 return
@@ -1019,6 +1293,7 @@ class GrainPlot(object):
             self.grains.remove(grain)
             if grain in self.created_grains:
                 self.created_grains.remove(grain)
+        self.index = None
         # Clear any prompts (assumed accidental) and update background
         self.clear_all()
         if self.blit:
@@ -1079,6 +1354,7 @@ class GrainPlot(object):
         new_grain.draw_patch(self.ax, self.scale, animated=self.blit)
         self.grains.append(new_grain)
         self.created_grains.append(new_grain)
+        self.index = None
         # Delete old constituent grains (since they are still selected)
         self.delete_grains()
         return new_grain
@@ -1350,6 +1626,14 @@ class GrainPlot(object):
         if button == 3:
             return
 
+        # Overlapping patches each fire a pick event for the same click.
+        # Only handle the topmost (last drawn) grain at the click location.
+        hits = self.get_index().grains_at(
+            mouseevent.xdata / self.scale, mouseevent.ydata / self.scale
+        )
+        if hits and event.artist.grain is not hits[-1]:
+            return
+
         # Save click location for reference by onclick / onclickup
         self.last_pick = (round(mouseevent.xdata), round(mouseevent.ydata))
 
@@ -1544,6 +1828,25 @@ def load_grains(fn: str, image: np.ndarray = None) -> list:
     return grains
 
 
+def get_polygons(grains) -> list:
+    """
+    Get grain outlines as shapely.Polygons.
+
+    Parameters
+    ----------
+    grains : list or GrainCollection
+        Grains to convert.
+
+    Returns
+    -------
+    list
+        One shapely.Polygon per grain.
+    """
+    if isinstance(grains, GrainCollection):
+        return list(grains.polygons)
+    return [g.polygon for g in grains]
+
+
 def save_grains(fn: str, grains: list):
     """
     Save grain boundaries to a GeoJSON file.
@@ -1552,22 +1855,27 @@ def save_grains(fn: str, grains: list):
     ----------
     fn : str
         Filename for csv to be created.
-    grains : list
-        List of grains to write to disk.
+    grains : list or GrainCollection
+        Grains to write to disk.
     """
-    segmenteverygrain.save_polygons([g.polygon for g in grains], fn)
+    segmenteverygrain.save_polygons(get_polygons(grains), fn)
 
 
-def get_summary(grains: list, px_per_m: float = 1.0) -> pd.DataFrame:
+def get_summary(
+    grains: list, px_per_m: float = 1.0, data: pd.DataFrame = None
+) -> pd.DataFrame:
     """
     Summarize grain information as a DataFrame.
 
     Parameters
     ----------
-    grains : list
-        List of grains to measure and summarize.
+    grains : list or GrainCollection
+        Grains to measure and summarize.
     px_per_m : float, default 1.
         Optional conversion from pixels to meters.
+    data : pd.DataFrame (optional)
+        Measurements in pixels, if already generated from measure_grains().
+        Otherwise taken from the collection, or from each grain's data.
 
     Returns
     -------
@@ -1575,17 +1883,23 @@ def get_summary(grains: list, px_per_m: float = 1.0) -> pd.DataFrame:
         Dataframe of grain measurements.
     """
     # Get DataFrame
-    df = pd.concat([g.data for g in grains], axis=1).T
+    if isinstance(data, pd.DataFrame):
+        df = data.copy()
+    elif isinstance(grains, GrainCollection):
+        df = (grains.measure() if grains.data is None else grains.data).copy()
+    else:
+        df = pd.concat([g.data for g in grains], axis=1).T
     # Convert units
-    # HACK: Applies first grain's region_props to all
-    for k, d in grains[0].region_props.items():
+    for k, d in Grain.region_props.items():
         if d:
             for col in [c for c in df.columns if k in c]:
                 df[col] /= px_per_m**d
     return df
 
 
-def save_summary(fn: str, grains: list, px_per_m: float = 1.0):
+def save_summary(
+    fn: str, grains: list, px_per_m: float = 1.0, summary: pd.DataFrame = None
+):
     """
     Save grain measurements as a csv.
 
@@ -1593,12 +1907,16 @@ def save_summary(fn: str, grains: list, px_per_m: float = 1.0):
     ----------
     fn : str
         Filename for csv to be created.
-    grains : list
-        List of grains to summarize.
+    grains : list or GrainCollection
+        Grains to summarize.
     px_per_m: float, default 1.
-        Optional conversion from pixels to meters.
+        Optional conversion from pixels to meters. Ignored if also passing a
+        pre-generated summary.
+    summary : pd.DataFrame (optional)
+        Grain summary, if already generated from get_summary().
     """
-    summary = get_summary(grains, px_per_m)
+    if isinstance(summary, type(None)):
+        summary = get_summary(grains, px_per_m)
     summary.to_csv(fn)
     return summary
 
@@ -1662,8 +1980,8 @@ def get_mask(grains: list, image: np.ndarray) -> np.ndarray:
 
     Parameters
     ----------
-    grains : list
-        List of grains to represent.
+    grains : list or GrainCollection
+        Grains to represent.
     image : np.ndarray
         Original image.
 
@@ -1672,12 +1990,18 @@ def get_mask(grains: list, image: np.ndarray) -> np.ndarray:
     np.ndarray
         Binary mask image.
     """
-    polys = [g.polygon for g in grains]
+    polys = get_polygons(grains)
     rasterized_image, mask = segmenteverygrain.create_labeled_image(polys, image)
     return keras.utils.img_to_array(mask)
 
 
-def save_mask(fn: str, grains: list, image: np.ndarray, scale: bool = False):
+def save_mask(
+    fn: str,
+    grains: list,
+    image: np.ndarray,
+    scale: bool = False,
+    mask: np.ndarray = None,
+):
     """
     Save binary mask of grain shapes to disk, optionally scaled to 0-255.
 
@@ -1685,15 +2009,20 @@ def save_mask(fn: str, grains: list, image: np.ndarray, scale: bool = False):
     ----------
     fn : str
         Filename for image to be created. File type will be interpreted.
-    grains : list
-        List of grains to represent.
+    grains : list or GrainCollection
+        Grains to represent.
     image : np.ndarray
         Original image.
     scale : bool
         Whether to scale from 0-255 for human readability (True)
         or 0-1 for model training (False).
+    mask : np.ndarray (optional)
+        Mask, if already generated from get_mask(). Rasterizing the grains is
+        the slow part, so reuse one mask when saving several versions.
     """
-    keras.utils.save_img(fn, get_mask(grains, image), scale=scale)
+    if isinstance(mask, type(None)):
+        mask = get_mask(grains, image)
+    keras.utils.save_img(fn, mask, scale=scale)
 
 
 # Point count ----------------------------------------------------------------
@@ -1728,7 +2057,7 @@ def make_grid(image: np.ndarray, spacing: int) -> tuple[list, list, list]:
 
 
 def filter_grains_by_points(
-    grains: list, points: list, unique: False
+    grains: list, points: list, unique: bool = False, index: "GrainIndex" = None
 ) -> tuple[list, list]:
     """
     Generate a list of grains at specified points.
@@ -1742,6 +2071,8 @@ def filter_grains_by_points(
     unique : bool
         Whether the returned list of grains should only contain unique items.
         If True, will remove duplicates. Default False.
+    index : GrainIndex (optional)
+        Spatial index built from the same grains, to reuse across calls.
 
     Returns
     -------
@@ -1750,31 +2081,193 @@ def filter_grains_by_points(
     point_found : list
         List representing whether a grain was found at each input point.
     """
-    # Don't modify original list when removing grains with unique == True
+    if index is None:
+        index = GrainIndex(grains)
+    n_points = len(points)
+    point_idx, grain_idx = index.query_points(points)
+    # For each point, the first grain in list order that contains it
+    found = np.full(n_points, -1)
     if unique:
-        grains = grains.copy()
-    # Find grains at given points
-    point_grains, point_found = [], []
-    for point in points:
-        for grain in grains:
-            if grain.polygon.contains(point):
-                # If results should be unique, remove grain from list
-                if unique:
-                    grains.remove(grain)
-                # Save detected grain
-                point_grains.append(grain)
-                # Grain found
-                point_found.append(True)
-                break
-        else:
-            # Grain not found
-            point_found.append(False)
+        # Each grain can only be counted once, by the first point that hits it
+        used = np.zeros(len(grains), dtype=bool)
+        bounds = np.searchsorted(point_idx, np.arange(n_points + 1))
+        for p in np.unique(point_idx):
+            for g in grain_idx[bounds[p] : bounds[p + 1]]:
+                if not used[g]:
+                    used[g] = True
+                    found[p] = g
+                    break
+    else:
+        hit, first = np.unique(point_idx, return_index=True)
+        found[hit] = grain_idx[first]
+    point_grains = [grains[i] for i in found if i >= 0]
+    point_found = (found >= 0).tolist()
     return point_grains, point_found
 
 
+class GrainIndex(object):
+    """Spatial index (shapely.STRtree) for point and box queries on grains."""
+
+    def __init__(self, grains: list):
+        """
+        Parameters
+        ----------
+        grains : list
+            Grains to index. Rebuild the index if the list changes.
+        """
+        self.grains = list(grains)
+        self.tree = shapely.STRtree([g.polygon for g in self.grains])
+
+    def query_points(self, points: list) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the grains containing each of many points.
+
+        Parameters
+        ----------
+        points : list
+            List or array of shapely.Point objects.
+
+        Returns
+        -------
+        point_idx, grain_idx : np.ndarray
+            Pairs of (point, grain) indices where the grain contains the point,
+            sorted by point and then by grain order.
+        """
+        point_idx, grain_idx = self.tree.query(points, predicate="within")
+        order = np.lexsort((grain_idx, point_idx))
+        return point_idx[order], grain_idx[order]
+
+    def grains_at(self, x: float, y: float) -> list:
+        """Grains containing the point (x, y), in list order."""
+        hits = self.tree.query(shapely.Point(x, y), predicate="within")
+        return [self.grains[i] for i in np.sort(hits)]
+
+    def grains_in_box(self, xmin: float, ymin: float, xmax: float, ymax: float):
+        """Grains wholly contained in a box, in list order."""
+        box = shapely.box(xmin, ymin, xmax, ymax)
+        hits = self.tree.query(box, predicate="contains")
+        return [self.grains[i] for i in np.sort(hits)]
+
+
 # Measurements ---------------------------------------------------------------
 
 
+def measure_grains(
+    grains: list, image: np.ndarray = None, labeled_color: bool = False
+) -> pd.DataFrame:
+    """
+    Measure all grains at once, vectorized over their coordinates.
+
+    Equivalent to calling Grain.measure() on every grain, without building a
+    shapely.Polygon and pd.Series per grain. Grain.data is left untouched;
+    pass the result to get_summary() as `data`.
+
+    Parameters
+    ----------
+    grains : list
+        List of grains to measure.
+    image : np.ndarray (optional)
+        Image in which grains were detected. Used to measure color info.
+    labeled_color : bool, default False
+        Whether to measure color from a single labeled raster of all grains
+        (see measure_colors). Faster, but pixels are assigned to grains by a
+        different rasterization, so color values differ slightly from
+        Grain.measure(). By default each grain is rasterized separately with
+        measure_color(), as Grain.measure() does.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per grain, with the same columns as Grain.measure().
+    """
+    return GrainCollection.from_grains(grains, image).measure(
+        labeled_color=labeled_color
+    )
+
+
+def ragged_coords(grains: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Concatenate grain coordinates into flat arrays.
+
+    Parameters
+    ----------
+    grains : list
+        List of grains.
+
+    Returns
+    -------
+    x, y : np.ndarray
+        Coordinates of all grains, one after another.
+    offsets : np.ndarray
+        Start of each grain in x and y, followed by the total length, so that
+        grain i spans x[offsets[i]:offsets[i + 1]].
+    """
+    counts = np.fromiter((g.xy.shape[1] for g in grains), dtype=np.int64)
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    xy = np.concatenate([g.xy for g in grains], axis=1).astype(float)
+    return xy[0], xy[1], offsets
+
+
+def measure_polygons(x: np.ndarray, y: np.ndarray, offsets: np.ndarray) -> dict:
+    """
+    Vectorized measure_polygon() over many polygons stored as ragged arrays.
+
+    Rings may be open or closed. Every polygon must have at least one vertex.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        Exterior coordinates of all polygons, one after another.
+    offsets : np.ndarray
+        Start of each polygon in x and y, followed by the total length.
+
+    Returns
+    -------
+    dict
+        Arrays with one value per polygon, with the same keys and meaning as
+        measure_polygon(), plus 'perimeter'.
+    """
+    starts = offsets[:-1]
+    counts = np.diff(offsets)
+    # Index of the next vertex, wrapping around at the end of each ring
+    nxt = np.arange(1, len(x) + 1)
+    nxt[offsets[1:] - 1] = starts
+    # Work relative to the first vertex of each ring to limit rounding errors
+    x0 = np.repeat(x[starts], counts)
+    y0 = np.repeat(y[starts], counts)
+    x, y = x - x0, y - y0
+    x_next, y_next = x[nxt], y[nxt]
+
+    def ring_sum(values):
+        return np.add.reduceat(values, starts)
+
+    # Same terms as measure_polygon(), summed per ring
+    common = x * y_next - x_next * y
+    with np.errstate(divide="ignore", invalid="ignore"):
+        A = 0.5 * ring_sum(common)
+        Cx = ring_sum((x + x_next) * common) / (6 * A)
+        Cy = ring_sum((y + y_next) * common) / (6 * A)
+    Ixx_origin = ring_sum((y**2 + y * y_next + y_next**2) * common) / 12
+    Iyy_origin = ring_sum((x**2 + x * x_next + x_next**2) * common) / 12
+    Ixy_origin = (
+        ring_sum((x * y_next + 2 * x * y + 2 * x_next * y_next + x_next * y) * common)
+        / 24
+    )
+
+    # measure_polygon() orients rings counter-clockwise first, which only
+    # flips the sign of A and the product of inertia
+    sign = np.sign(A)
+    return {
+        "area": np.abs(A),
+        "centroid": (Cy + y0[starts], Cx + x0[starts]),
+        "Ixx": np.abs(Ixx_origin - A * Cy**2),
+        "Iyy": np.abs(Iyy_origin - A * Cx**2),
+        "Ixy": (Ixy_origin - A * Cx * Cy) * sign,
+        "perimeter": ring_sum(np.hypot(x_next - x, y_next - y)),
+    }
+
+
 def measure_color(image: np.ndarray, polygon: shapely.Polygon) -> dict:
     """
     Measure color intensities within a polygonal region of an image.
@@ -1889,6 +2382,71 @@ def measure_color(image: np.ndarray, polygon: shapely.Polygon) -> dict:
     }
 
 
+def measure_colors(image: np.ndarray, polygons: list) -> pd.DataFrame:
+    """
+    Measure color intensities within many polygons in a single pass.
+
+    All polygons are rasterized once into an integer label image, the same
+    way get_mask() does, then per-label statistics are reduced over the
+    pixels of each channel. Pixels covered by overlapping polygons count
+    towards the one listed last.
+
+    Values differ slightly from measure_color(), which only samples the pixels
+    whose window lies within the polygon's bounds rounded inwards, so edge
+    pixels are included here and left out there.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        Input image for analysis.
+    polygons : list of shapely.Polygon
+        Polygons defining the regions of interest within the image.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per polygon, with the same columns as measure_color().
+        Polygons without any pixels in the labeled raster, outside the image
+        or covered by polygons listed after them, get NaN.
+    """
+    n = len(polygons)
+    columns = [
+        f"{stat}_intensity-{c}" for c in range(3) for stat in ("max", "min", "mean")
+    ]
+    if n == 0:
+        return pd.DataFrame(columns=columns)
+
+    # Pixel (row, col) covers [col, col + 1) x [row, row + 1), as in measure_color
+    labels = rasterio.features.rasterize(
+        ((p, i) for i, p in enumerate(polygons, start=1)),
+        out_shape=image.shape[:2],
+        fill=0,
+        dtype=np.int32,
+    )
+    flat_labels = labels.ravel()
+    counts = np.bincount(flat_labels, minlength=n + 1)[1:]
+    found = counts > 0
+    if not found.all():
+        logger.warning(f"No pixels found within {np.sum(~found)} polygon(s)")
+
+    # Group grain pixels by label with one sort, then reduce each group
+    inside = np.flatnonzero(flat_labels)
+    order = np.argsort(flat_labels[inside], kind="stable")
+    pixels = image.reshape(-1, image.shape[2])[inside[order], :3]
+    starts = np.cumsum(counts) - counts
+
+    stats = np.full((n, 3, 3), np.nan)
+    if len(pixels):
+        starts = starts[found]
+        stats[found, 0] = np.maximum.reduceat(pixels, starts, axis=0)
+        stats[found, 1] = np.minimum.reduceat(pixels, starts, axis=0)
+        sums = np.add.reduceat(pixels, starts, axis=0, dtype=np.float64)
+        stats[found, 2] = sums / counts[found, None]
+
+    # Columns ordered by channel, then max, min, mean
+    return pd.DataFrame(stats.transpose(0, 2, 1).reshape(n, 9), columns=columns)
+
+
 def measure_polygon(polygon: shapely.Polygon) -> dict:
     """
     Calculate the area, centroid, and second moments of area of a polygon.
@@ -1,4 +1,5 @@
 import logging
+import re
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
@@ -9,6 +10,20 @@ LOG_FILE = LOG_DIR / "app.log"
 
 LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 
+# Access tokens passed in URLs, e.g. to /documents/{id}/events
+_TOKEN_PARAM = re.compile(r"([?&]token=)[^&\s\"]*")
+
+
+class RedactTokens(logging.Filter):
+    """Hide token query parameters in logged URLs, access logs included."""
+
+    def filter(self, record):
+        message = record.getMessage()
+        if "token=" in message:
+            record.msg = _TOKEN_PARAM.sub(r"\1[REDACTED]", message)
+            record.args = ()
+        return True
+
 
 def setup_logging():
     logging.basicConfig(
@@ -24,3 +39,8 @@ def setup_logging():
             logging.StreamHandler(),  # Output to terminal
         ],
     )
+    redact = RedactTokens()
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(redact)
+    # Has its own handlers under uvicorn
+    logging.getLogger("uvicorn.access").addFilter(redact)
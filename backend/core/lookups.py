@@ -0,0 +1,75 @@
+# core/lookups.py
+import logging
+import threading
+import time
+
+from core.config import settings
+from db.database import SessionLocal
+from models.role import Role
+from models.status import Status
+
+
+class LookupTable:
+    """
+    In-process name -> id map of a small seeded table (see db/seeders).
+
+    Loaded once and reloaded when a name is missing, e.g. because the table
+    was seeded after startup, or after LOOKUP_CACHE_TTL_SECONDS if set.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._ids = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        db = SessionLocal()
+        try:
+            ids = {row.name: row.id for row in db.query(self.model).all()}
+        finally:
+            db.close()
+        # Swapped in whole, readers never see a partial map
+        self._ids = ids
+        self._loaded_at = time.monotonic()
+
+    def _stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        ttl = settings.LOOKUP_CACHE_TTL_SECONDS
+        return ttl > 0 and time.monotonic() - self._loaded_at > ttl
+
+    def name(self, id: int) -> str:
+        """Name of the row with this id. Raises LookupError if there is none."""
+        for name, row_id in self._ids.items():
+            if row_id == id:
+                return name
+        self.load()
+        for name, row_id in self._ids.items():
+            if row_id == id:
+                return name
+        raise LookupError(f"{self.model.__name__} {id} not found in database")
+
+    def id(self, name: str) -> int:
+        """Id of the row called name. Raises LookupError if there is none."""
+        if self._stale() or name not in self._ids:
+            with self._lock:
+                if self._stale() or name not in self._ids:
+                    self.load()
+        try:
+            return self._ids[name]
+        except KeyError:
+            raise LookupError(
+                f"{self.model.__name__} '{name}' not found in database"
+            ) from None
+
+
+statuses = LookupTable(Status)
+roles = LookupTable(Role)
+
+
+def load():
+    """Load all lookup tables, at startup or to pick up changes."""
+    for table in (statuses, roles):
+        table.load()
+    logging.info("Lookup tables loaded")
@@ -0,0 +1,128 @@
+# core/metrics.py
+import os
+import resource
+import sys
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import func
+
+from core import lookups
+from db.database import SessionLocal
+from models.job import Job
+
+# Set for the analysis workers by tasks/worker.py. Processes sharing the
+# directory, the web app included, then expose each other's metrics.
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+STAGE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+STAGE_SECONDS = Histogram(
+    "grain_analysis_stage_seconds",
+    "Time spent in each stage of an analysis, see core/progress.py",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+ANALYSIS_SECONDS = Histogram(
+    "grain_analysis_seconds",
+    "Duration of a whole analysis, cached results excluded",
+    buckets=STAGE_BUCKETS,
+)
+ANALYSES_IN_PROGRESS = Gauge(
+    "grain_analyses_in_progress",
+    "Analyses currently running",
+    multiprocess_mode="livesum",
+)
+ANALYSIS_PEAK_RSS = Histogram(
+    "grain_analysis_peak_rss_bytes",
+    "Peak resident memory of the worker during an analysis",
+    buckets=tuple(2**i * 1024**3 // 4 for i in range(9)),  # 256MB to 64GB
+)
+GRAINS_PER_IMAGE = Histogram(
+    "grain_analysis_grains",
+    "Grains found per analyzed image",
+    buckets=(10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000),
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response headers are sent, by router",
+    ["router", "method", "status"],
+)
+
+
+class JobQueueCollector:
+    """Number of jobs per status, counted in the database on every scrape."""
+
+    def collect(self):
+        db = SessionLocal()
+        try:
+            counts = dict(
+                db.query(Job.status_id, func.count(Job.id))
+                .group_by(Job.status_id)
+                .all()
+            )
+        finally:
+            db.close()
+
+        jobs = GaugeMetricFamily("grain_jobs", "Jobs by status", labels=["status"])
+        for status_id, count in counts.items():
+            jobs.add_metric([lookups.statuses.name(status_id)], count)
+        yield jobs
+
+
+# Without describe(), so registering doesn't query the database
+_queue_registry = CollectorRegistry()
+_queue_registry.register(JobQueueCollector())
+
+
+def exposition() -> bytes:
+    """All metrics in the Prometheus text format."""
+    if os.environ.get(MULTIPROC_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(_queue_registry)
+
+
+def reset_peak_rss():
+    """
+    Reset the peak resident memory of this process, so peak_rss() covers
+    only what runs afterwards. Linux only, elsewhere the peak is never reset.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss() -> int:
+    """Peak resident memory of this process in bytes."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def record_analysis(timings: dict, seconds: float, grains: int):
+    """Observe one finished analysis, see ProgressTracker.timings."""
+    for stage, stage_seconds in timings.items():
+        STAGE_SECONDS.labels(stage).observe(stage_seconds)
+    ANALYSIS_SECONDS.observe(seconds)
+    ANALYSIS_PEAK_RSS.observe(peak_rss())
+    if grains is not None:
+        GRAINS_PER_IMAGE.observe(grains)
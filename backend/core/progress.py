@@ -0,0 +1,122 @@
+# core/progress.py
+import logging
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Share of the overall percentage covered by stages that report counts.
+# Other stages ("loading", "merging", "measuring", ...) are only timed.
+STAGE_RANGES = {
+    "unet": (0, 90),
+    "sam": (0, 90),
+    "writing": (90, 100),
+}
+
+
+def no_progress(
+    stage: str, done: int = 0, total: int = 0, seconds: Optional[float] = None
+):
+    """
+    Default progress callback of the analysis functions, does nothing.
+
+    Progress callbacks are called as progress(stage, done, total) when the
+    analysis enters a stage or advances in it, e.g. ("sam", 3, 40) once the
+    third of 40 prompt batches is decoded, and as progress(stage, seconds=s)
+    to record the duration of work that ran concurrently, like one artifact
+    write.
+    """
+
+
+def scaled(progress: Callable, part: int, parts: int) -> Callable:
+    """
+    Progress callback for part `part` (0-based) of `parts` equal parts of a
+    stage, e.g. one patch of an image, reporting counts as a share of the
+    whole.
+    """
+
+    def report(
+        stage: str, done: int = 0, total: int = 0, seconds: Optional[float] = None
+    ):
+        if total:
+            done, total = part * total + done, parts * total
+        progress(stage, done, total, seconds)
+
+    return report
+
+
+class ProgressTracker:
+    """
+    Progress callback that times the stages of an analysis and passes
+    throttled updates on, e.g. to the jobs table.
+
+    Time between two stage changes is charged to the earlier stage, so
+    stages entered repeatedly (UNET and SAM alternate for every patch)
+    add up.
+
+    Parameters
+    ----------
+    on_update : callable
+        Called as on_update(stage, percent, timings) at most every
+        `interval` seconds, and by finish().
+    interval : float, default 2.0
+        Minimum seconds between updates.
+    """
+
+    def __init__(self, on_update: Callable, interval: float = 2.0):
+        self.on_update = on_update
+        self.interval = interval
+        self.stage = None
+        self.label = None
+        self.percent = 0
+        self.timings = {}
+        self._stage_started = None
+        self._last_update = None
+
+    def __call__(
+        self,
+        stage: str,
+        done: int = 0,
+        total: int = 0,
+        seconds: Optional[float] = None,
+    ):
+        if seconds is not None:
+            self.timings[stage] = round(self.timings.get(stage, 0.0) + seconds, 3)
+            return
+
+        now = time.monotonic()
+        if stage != self.stage:
+            self._charge(now)
+            self.stage = stage
+        self.label = f"{stage} {done}/{total}" if total else stage
+        if total and stage in STAGE_RANGES:
+            start, end = STAGE_RANGES[stage]
+            percent = int(start + (end - start) * min(done / total, 1.0))
+            # Streamed tiles revisit stages, never go backwards
+            self.percent = max(self.percent, percent)
+
+        if self._last_update is None or now - self._last_update >= self.interval:
+            self._update(now)
+
+    def finish(self):
+        """Charge the running stage and send a last update."""
+        now = time.monotonic()
+        self._charge(now)
+        self.stage = None
+        self._update(now)
+
+    def _charge(self, now: float):
+        if self.stage is not None:
+            elapsed = now - self._stage_started
+            self.timings[self.stage] = round(
+                self.timings.get(self.stage, 0.0) + elapsed, 3
+            )
+        self._stage_started = now
+
+    def _update(self, now: float):
+        self._last_update = now
+        try:
+            self.on_update(self.label, self.percent, dict(self.timings))
+        except Exception as e:
+            # Progress is informational, never fail the analysis over it
+            logger.warning(f"Failed to report progress: {e}")
@@ -0,0 +1,191 @@
+# core/result_cache.py
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+from core.config import settings
+
+# Files written by GrainAnalyzer.analyze for one document
+RESULT_SUFFIXES = (
+    "_grains.jpg",
+    "_grains.geojson",
+    "_summary.csv",
+    "_summary.jpg",
+    "_mask.png",
+    "_mask2.jpg",
+)
+
+CHUNK_SIZE = 1024 * 1024
+
+# When this process last ran evict(), see store()
+_last_evict = None
+
+
+def file_sha256(path) -> str:
+    """Hash a file without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _model_checksum(path: str, size: int, mtime_ns: int) -> str:
+    # size and mtime are part of the cache key so replaced models are rehashed
+    return file_sha256(path)
+
+
+def model_checksums(model_files: Iterable) -> dict:
+    """Checksums of the model files, computed once per process."""
+    checksums = {}
+    for path in model_files:
+        stat = os.stat(path)
+        checksums[Path(path).name] = _model_checksum(
+            str(path), stat.st_size, stat.st_mtime_ns
+        )
+    return checksums
+
+
+def cache_key(
+    image_path: str, params: dict, model_files: Iterable, image_hash: str = None
+) -> str:
+    """
+    Key identifying an analysis result.
+
+    Parameters
+    ----------
+    image_path : str
+        Image being analyzed.
+    params : dict
+        Pipeline parameters that change the output.
+    model_files : list of paths
+        Model weights used by the pipeline.
+    image_hash : str (optional)
+        Precomputed sha256 of the image, to avoid reading it again.
+
+    Returns
+    -------
+    str
+        Hex digest identifying image, parameters and models.
+    """
+    payload = {
+        "image": image_hash or file_sha256(image_path),
+        "params": params,
+        "models": model_checksums(model_files),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _cache_root() -> Path:
+    return Path(settings.RESULT_CACHE_DIR)
+
+
+def _entry_dir(key: str) -> Path:
+    return _cache_root() / key[:2] / key
+
+
+def _link_or_copy(src: Path, dst: Path):
+    """Hard link src to dst, copying if linking isn't possible."""
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def unlink_results(output_prefix: str):
+    """
+    Remove the result files under output_prefix before they are written
+    again. Restored and stored files are hard links to cache entries, the
+    writers open them in place and would change the entries too.
+    """
+    output_prefix = Path(output_prefix)
+    for suffix in RESULT_SUFFIXES:
+        (output_prefix.parent / f"{output_prefix.name}{suffix}").unlink(missing_ok=True)
+
+
+def lookup(key: str) -> Optional[Path]:
+    """
+    Return the cache entry for key, or None on a miss.
+
+    A hit refreshes the entry's modification time, which drives LRU eviction.
+    """
+    if not settings.RESULT_CACHE_ENABLED:
+        return None
+    entry = _entry_dir(key)
+    if not entry.is_dir():
+        return None
+    os.utime(entry)
+    return entry
+
+
+def restore(entry: Path, output_prefix: str):
+    """Recreate the result files of a cache entry under output_prefix."""
+    output_prefix = Path(output_prefix)
+    output_prefix.parent.mkdir(parents=True, exist_ok=True)
+    for src in entry.iterdir():
+        suffix = src.name[len("result") :]
+        _link_or_copy(src, output_prefix.parent / f"{output_prefix.name}{suffix}")
+
+
+def store(key: str, output_prefix: str):
+    """Add the result files under output_prefix to the cache."""
+    if not settings.RESULT_CACHE_ENABLED:
+        return
+    entry = _entry_dir(key)
+    if entry.is_dir():
+        return
+
+    output_prefix = Path(output_prefix)
+    # Build the entry next to its final location and rename it into place,
+    # so readers never see a partial entry
+    tmp = _cache_root() / f".tmp-{uuid.uuid4()}"
+    tmp.mkdir(parents=True)
+    try:
+        for suffix in RESULT_SUFFIXES:
+            src = output_prefix.parent / f"{output_prefix.name}{suffix}"
+            if src.exists():
+                _link_or_copy(src, tmp / f"result{suffix}")
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        os.rename(tmp, entry)
+    except OSError:
+        # Another worker stored the same result first
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+
+    # Every entry is stat'ed, not worth doing on every store
+    global _last_evict
+    now = time.monotonic()
+    if _last_evict is None or now - _last_evict >= settings.RESULT_CACHE_EVICT_INTERVAL:
+        _last_evict = now
+        evict()
+
+
+def evict(max_bytes: int = None):
+    """Remove least recently used entries until the cache fits in max_bytes."""
+    max_bytes = settings.RESULT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    root = _cache_root()
+    if not root.is_dir():
+        return
+
+    entries = []
+    for entry in root.glob("??/*"):
+        size = sum(f.stat().st_size for f in entry.iterdir())
+        entries.append((entry.stat().st_mtime, size, entry))
+    total = sum(size for _, size, _ in entries)
+
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+        logging.info(f"Evicted cached result {entry.name}")
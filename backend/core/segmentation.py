@@ -0,0 +1,273 @@
+# core/segmentation.py
+import logging
+
+import numpy as np
+import segmenteverygrain as seg
+import skimage
+import torch
+from shapely.affinity import translate
+
+from core.progress import no_progress, scaled
+
+logger = logging.getLogger(__name__)
+
+# A prompt's mask is discarded if it covers more than this share of the patch,
+# same threshold as segmenteverygrain.one_point_prompt
+MAX_MASK_FRACTION = 0.5
+
+# Masks touching this many border pixels are dropped as edge grains,
+# same width as segmenteverygrain.sam_segmentation
+EDGE_WIDTH = 4
+
+
+def predict_large_image(
+    image: np.ndarray,
+    unet,
+    predictor,
+    min_area: float,
+    patch_size: int = 2000,
+    overlap: int = 300,
+    batch_size: int = 16,
+    progress=no_progress,
+) -> tuple[list, np.ndarray]:
+    """
+    Patch-based grain segmentation with batched SAM prompts.
+
+    Follows segmenteverygrain.predict_large_image, but each patch is embedded
+    once and all of its point prompts go through the mask decoder in batches
+    of `batch_size`, instead of one decoder call per prompt. The per-patch
+    labeled image and regionprops table computed by sam_segmentation are
+    skipped since only the polygons are used.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        Image to segment, already loaded.
+    unet : keras.Model
+        Unet model used for the preliminary grain prediction.
+    predictor : segment_anything.SamPredictor
+        SAM predictor used to create grain masks from the Unet prompts.
+    min_area : float
+        Minimum area of a valid grain, in pixels.
+    patch_size : int, default 2000
+        Size of each square patch.
+    overlap : int, default 300
+        Overlap between neighbouring patches.
+    batch_size : int, default 16
+        Number of point prompts decoded together. Masks are returned at patch
+        resolution, so memory grows with batch_size * patch_size**2.
+    progress : callable (optional)
+        Progress callback, see core.progress. Reports "unet" per patch and
+        "sam" per prompt batch, both counted across the whole image, then
+        "merging".
+
+    Returns
+    -------
+    all_grains : list
+        Grains in image coordinates, as shapely.Polygon.
+    image_pred : np.ndarray
+        Blended Unet prediction for the entire image.
+    """
+    step_size = patch_size - overlap
+    img_height, img_width = image.shape[:2]
+    rows = range(0, img_height - patch_size + step_size + 1, step_size)
+    cols = range(0, img_width - patch_size + step_size + 1, step_size)
+    total_patches = len(rows) * len(cols)
+
+    all_grains = []
+    image_pred = np.zeros((img_height, img_width, 3), dtype=np.float32)
+
+    patch_num = 0
+    for i in rows:
+        for j in cols:
+            patch_num += 1
+            progress("unet", patch_num - 1, total_patches)
+            patch = image[
+                i : min(i + patch_size, img_height), j : min(j + patch_size, img_width)
+            ]
+            patch_pred = seg.predict_image(patch, unet, I=256)
+
+            # Blend overlapping regions
+            weights = np.ones_like(patch_pred)
+            if i > 0:
+                weights[:overlap, :] *= np.linspace(0, 1, overlap)[:, None, None]
+            if j > 0:
+                weights[:, :overlap] *= np.linspace(0, 1, overlap)[None, :, None]
+            if i + patch_size < img_height:
+                weights[-overlap:, :] *= np.linspace(1, 0, overlap)[:, None, None]
+            if j + patch_size < img_width:
+                weights[:, -overlap:] *= np.linspace(1, 0, overlap)[None, :, None]
+            image_pred[
+                i : min(i + patch_size, img_height), j : min(j + patch_size, img_width)
+            ] += (patch_pred * weights)
+
+            labels, coords = seg.label_grains(patch, patch_pred, dbs_max_dist=20.0)
+            if len(coords) > 0:
+                grains = sam_segmentation(
+                    predictor,
+                    patch,
+                    patch_pred,
+                    coords,
+                    labels,
+                    min_area,
+                    batch_size,
+                    progress=scaled(progress, patch_num - 1, total_patches),
+                )
+                all_grains += [translate(g, xoff=j, yoff=i) for g in grains]
+            logger.info(f"Processed patch {patch_num} of {total_patches}")
+
+    progress("merging")
+    new_grains, comps, _ = seg.find_connected_components(all_grains, min_area)
+    all_grains = seg.merge_overlapping_polygons(
+        all_grains, new_grains, comps, min_area, image_pred
+    )
+    return all_grains, image_pred
+
+
+def sam_segmentation(
+    predictor,
+    image: np.ndarray,
+    image_pred: np.ndarray,
+    coords: np.ndarray,
+    labels: np.ndarray,
+    min_area: float,
+    batch_size: int = 16,
+    progress=no_progress,
+) -> list:
+    """
+    Segment grains in one patch from point prompts, in batches.
+
+    Equivalent to segmenteverygrain.sam_segmentation with
+    remove_edge_grains=True, returning only the merged polygons.
+
+    Parameters
+    ----------
+    predictor : segment_anything.SamPredictor
+        SAM predictor. Its image embedding is set here, once.
+    image : np.ndarray
+        Patch to segment.
+    image_pred : np.ndarray
+        Unet prediction for the patch.
+    coords : np.ndarray
+        (x, y) point prompts, one per candidate grain.
+    labels : np.ndarray
+        Labeled Unet grains, from segmenteverygrain.label_grains.
+    min_area : float
+        Minimum area of a valid grain, in pixels.
+    batch_size : int, default 16
+        Number of prompts sent to the mask decoder at once.
+    progress : callable (optional)
+        Progress callback, see core.progress. Reports "sam" per batch.
+
+    Returns
+    -------
+    list
+        Grains in patch coordinates, as shapely.Polygon.
+    """
+    total_batches = -(-len(coords) // batch_size)
+    # Embedding the patch is counted as SAM time
+    progress("sam", 0, total_batches)
+    predictor.set_image(image)
+    grains = []
+    for start in range(0, len(coords), batch_size):
+        masks, scores = predict_points(predictor, coords[start : start + batch_size])
+        for prompt_masks, prompt_scores in zip(masks, scores):
+            mask, sx, sy = select_mask(prompt_masks, prompt_scores)
+            if mask is None or _touches_edge(mask):
+                continue
+            grains = seg.collect_polygon_from_mask(
+                labels, mask, image_pred, grains, sx, sy
+            )
+        progress("sam", start // batch_size + 1, total_batches)
+
+    new_grains, comps, _ = seg.find_connected_components(grains, min_area)
+    return seg.merge_overlapping_polygons(
+        grains, new_grains, comps, min_area, image_pred
+    )
+
+
+def predict_points(predictor, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Run single-point prompts through the SAM mask decoder as one batch.
+
+    Parameters
+    ----------
+    predictor : segment_anything.SamPredictor
+        SAM predictor with an image already set.
+    points : np.ndarray
+        (N, 2) array of (x, y) prompts in image coordinates.
+
+    Returns
+    -------
+    masks : np.ndarray
+        (N, 3, H, W) boolean masks, three candidates per prompt.
+    scores : np.ndarray
+        (N, 3) predicted IoU of each candidate.
+    """
+    points = predictor.transform.apply_coords(
+        np.asarray(points, dtype=float), predictor.original_size
+    )
+    point_coords = torch.as_tensor(
+        points[:, None, :], dtype=torch.float, device=predictor.device
+    )
+    point_labels = torch.ones(
+        (len(points), 1), dtype=torch.int, device=predictor.device
+    )
+    with torch.no_grad():
+        masks, scores, _ = predictor.predict_torch(
+            point_coords, point_labels, multimask_output=True
+        )
+    return masks.cpu().numpy(), scores.cpu().numpy()
+
+
+def select_mask(masks: np.ndarray, scores: np.ndarray) -> tuple:
+    """
+    Pick the best candidate mask for one prompt and trace its outline.
+
+    Mirrors the post-processing of segmenteverygrain.one_point_prompt: masks
+    covering more than half of the image are ignored, the highest scoring one
+    is kept and reduced to its largest connected component.
+
+    Parameters
+    ----------
+    masks : np.ndarray
+        (3, H, W) candidate masks for the prompt.
+    scores : np.ndarray
+        Predicted IoU of each candidate.
+
+    Returns
+    -------
+    mask, sx, sy
+        Selected mask and the x and y coordinates of its contour,
+        or (None, None, None) if no usable mask was found.
+    """
+    total = masks.shape[1] * masks.shape[2]
+    fractions = masks.reshape(len(masks), -1).sum(axis=1) / total
+    valid = np.flatnonzero(fractions <= MAX_MASK_FRACTION)
+    if len(valid) == 0:
+        return None, None, None
+
+    mask = masks[valid[np.argmax(scores[valid])]].copy()
+    components, n_elems = skimage.measure.label(mask, return_num=True, connectivity=1)
+    if n_elems > 1:
+        # Keep only the largest object
+        largest_label = np.argmax(np.bincount(components.ravel())[1:]) + 1
+        mask[components != largest_label] = False
+    if not mask.any():
+        return None, None, None
+
+    contours = skimage.measure.find_contours(mask, 0.5)
+    if len(contours) == 0:
+        return None, None, None
+    return mask, contours[0][:, 1], contours[0][:, 0]
+
+
+def _touches_edge(mask: np.ndarray) -> bool:
+    """Whether a mask reaches the outer EDGE_WIDTH pixels of its patch."""
+    w = EDGE_WIDTH
+    return bool(
+        mask[:w, :].any()
+        or mask[-w:, :].any()
+        or mask[:, :w].any()
+        or mask[:, -w:].any()
+    )
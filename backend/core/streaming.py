@@ -0,0 +1,214 @@
+# core/streaming.py
+import json
+import logging
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import rasterio
+import shapely
+from rasterio.windows import Window
+from shapely.affinity import translate
+from shapely.geometry import mapping
+
+from core import interactions as si
+from core import segmentation
+from core.progress import no_progress, scaled
+
+logger = logging.getLogger(__name__)
+
+
+def image_pixels(image_path: str) -> int:
+    """Number of pixels in an image, read from its header only."""
+    with warnings.catch_warnings():
+        # Plain JPEG and PNG files have no georeference, which is fine here
+        warnings.simplefilter("ignore", rasterio.errors.NotGeoreferencedWarning)
+        with rasterio.open(image_path) as src:
+            return src.width * src.height
+
+
+def iter_tiles(width: int, height: int, tile_size: int, halo: int):
+    """
+    Split an image into square tiles with a halo of context around each.
+
+    Yields
+    ------
+    core : tuple
+        (x0, y0, x1, y1) of the region the tile is responsible for. Cores
+        cover the image exactly once.
+    window : rasterio.windows.Window
+        Core plus halo, clipped to the image, to read and segment.
+    """
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            x1, y1 = min(x0 + tile_size, width), min(y0 + tile_size, height)
+            wx0, wy0 = max(x0 - halo, 0), max(y0 - halo, 0)
+            wx1, wy1 = min(x1 + halo, width), min(y1 + halo, height)
+            yield (x0, y0, x1, y1), Window(wx0, wy0, wx1 - wx0, wy1 - wy0)
+
+
+def read_tile(src, window: Window) -> np.ndarray:
+    """Read one window of an 8-bit image as an (H, W, 3) RGB array."""
+    indexes = [1, 2, 3] if src.count >= 3 else [1, 1, 1]
+    tile = src.read(indexes, window=window)
+    return np.ascontiguousarray(np.moveaxis(tile, 0, -1))
+
+
+class GeoJSONWriter:
+    """
+    Write polygons to a GeoJSON FeatureCollection as they come in, in the
+    same layout as segmenteverygrain.save_polygons.
+    """
+
+    def __init__(self, fn):
+        self.f = open(fn, "w")
+        self.f.write('{"type": "FeatureCollection", "features": [')
+        self.count = 0
+
+    def write(self, polygons):
+        for polygon in polygons:
+            feature = {
+                "type": "Feature",
+                "geometry": mapping(polygon),
+                "properties": {},
+            }
+            self.f.write(", " if self.count else "")
+            self.f.write(json.dumps(feature))
+            self.count += 1
+
+    def close(self):
+        self.f.write("]}")
+        self.f.close()
+
+
+def analyze_streaming(
+    image_path: str,
+    output_prefix: str,
+    unet,
+    predictor,
+    min_area: float,
+    px_per_m: float,
+    tile_size: int = 4096,
+    halo: int = 256,
+    patch_size: int = 2000,
+    overlap: int = 200,
+    batch_size: int = 16,
+    labeled_color: bool = False,
+    progress=no_progress,
+) -> int:
+    """
+    Segment and measure an image tile by tile, without loading it whole.
+
+    Each tile is read through a rasterio window together with a halo of
+    neighbouring pixels and segmented with segmentation.predict_large_image.
+    A grain found in several tiles is kept only by the tile whose core
+    contains its centroid, so grains crossing a seam are written once, as
+    long as they are smaller than the halo. Polygons and measurements are
+    appended to the GeoJSON and summary CSV after every tile, so peak memory
+    is bounded by the tile size rather than the image size. Tiled GeoTIFFs
+    read fastest; other formats GDAL can open work as well.
+
+    Only the GeoJSON, summary CSV and histogram are produced. The overlay and
+    mask images would need the full image in memory.
+
+    Parameters
+    ----------
+    image_path : str
+        Image to analyze, 8-bit RGB(A) or grayscale.
+    output_prefix : str
+        Path prefix of the result files.
+    unet : keras.Model
+        Unet model used for the preliminary grain prediction.
+    predictor : segment_anything.SamPredictor
+        SAM predictor used to create grain masks.
+    min_area : float
+        Minimum area of a valid grain, in pixels.
+    px_per_m : float
+        Conversion from pixels to meters.
+    tile_size : int, default 4096
+        Size of each square tile core, in pixels.
+    halo : int, default 256
+        Context read around each tile core. Must exceed the largest grain.
+    patch_size, overlap, batch_size : int
+        Passed on to segmentation.predict_large_image for each tile.
+    labeled_color : bool, default False
+        Passed on to GrainCollection.measure for each tile.
+    progress : callable (optional)
+        Progress callback, see core.progress. UNET and SAM progress is
+        counted across all tiles.
+
+    Returns
+    -------
+    int
+        Number of grains written.
+    """
+    output_prefix = Path(output_prefix)
+    output_prefix.parent.mkdir(parents=True, exist_ok=True)
+    geojson_fn = output_prefix.parent / f"{output_prefix.name}_grains.geojson"
+    csv_fn = output_prefix.parent / f"{output_prefix.name}_summary.csv"
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", rasterio.errors.NotGeoreferencedWarning)
+        src = rasterio.open(image_path)
+
+    writer = GeoJSONWriter(geojson_fn)
+    total = 0
+    try:
+        tiles = list(iter_tiles(src.width, src.height, tile_size, halo))
+        for tile_num, ((x0, y0, x1, y1), window) in enumerate(tiles, start=1):
+            progress("loading")
+            tile = read_tile(src, window)
+            polygons, _ = segmentation.predict_large_image(
+                tile,
+                unet,
+                predictor,
+                min_area=min_area,
+                patch_size=patch_size,
+                overlap=overlap,
+                batch_size=batch_size,
+                progress=scaled(progress, tile_num - 1, len(tiles)),
+            )
+
+            progress("measuring")
+            # Resolve seams: keep grains centered in this tile's core
+            polygons = np.asarray(polygons, dtype=object)
+            if len(polygons):
+                centroids = shapely.get_coordinates(shapely.centroid(polygons))
+                cx = centroids[:, 0] + window.col_off
+                cy = centroids[:, 1] + window.row_off
+                inside = (cx >= x0) & (cx < x1) & (cy >= y0) & (cy < y1)
+                polygons = polygons[inside]
+
+            grains = si.GrainCollection.from_polygons(polygons, image=tile)
+            if len(grains):
+                data = grains.measure(labeled_color=labeled_color)
+                data["centroid-0"] += window.row_off
+                data["centroid-1"] += window.col_off
+                summary = si.get_summary(grains, px_per_m)
+                summary.index = pd.RangeIndex(total, total + len(summary))
+                summary.to_csv(csv_fn, mode="a" if total else "w", header=not total)
+                writer.write(
+                    translate(p, xoff=window.col_off, yoff=window.row_off)
+                    for p in grains.polygons
+                )
+                total += len(grains)
+            logger.info(
+                f"Streamed tile {tile_num} of {len(tiles)}, {total} grains so far"
+            )
+    finally:
+        writer.close()
+        src.close()
+
+    if total == 0:
+        # Same (empty) csv as the in-memory path
+        pd.DataFrame().to_csv(csv_fn)
+        return total
+
+    progress("writing", 0, 1)
+    summary = pd.read_csv(csv_fn, usecols=["major_axis_length", "minor_axis_length"])
+    si.save_histogram(
+        output_prefix.parent / f"{output_prefix.name}_summary.jpg", summary=summary
+    )
+    progress("writing", 1, 1)
+    return total
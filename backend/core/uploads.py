@@ -0,0 +1,97 @@
+# core/uploads.py
+import hashlib
+import os
+from typing import AsyncIterable, AsyncIterator
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised once an upload grows past the allowed size."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"Upload exceeds {max_size} bytes")
+
+
+def _write_chunk(f, digest, chunk: bytes):
+    digest.update(chunk)
+    f.write(chunk)
+
+
+async def read_chunks(
+    file: UploadFile, chunk_size: int = CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Chunks of an UploadFile, for save_upload()."""
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+async def save_upload(
+    chunks: AsyncIterable[bytes], dest_path: str, max_size: int
+) -> tuple[int, str]:
+    """
+    Stream an upload to disk chunk by chunk.
+
+    chunks is typically request.stream(), so the body is written as it
+    arrives, without being spooled first, or read_chunks() of an UploadFile.
+    Only one chunk is held in memory at a time. Hashing and writing run in
+    the thread pool so the event loop stays free, and the upload is aborted
+    as soon as it grows past max_size. On any error, a client disconnecting
+    included, the partial file is removed.
+
+    Returns
+    -------
+    size : int
+        Size of the file in bytes.
+    sha256 : str
+        Hex digest of the file's content.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    f = await run_in_threadpool(open, dest_path, "wb")
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLarge(max_size)
+            await run_in_threadpool(_write_chunk, f, digest, chunk)
+    except BaseException:
+        await run_in_threadpool(f.close)
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    await run_in_threadpool(f.close)
+    return size, digest.hexdigest()
+
+
+def save_stream(src, dest_path: str, max_size: int, chunk_size: int = CHUNK_SIZE):
+    """
+    Blocking counterpart of save_upload() for file objects, e.g. members of
+    an uploaded ZIP archive. Size is checked while copying, not trusted from
+    the archive's headers.
+
+    Returns
+    -------
+    size : int
+        Size of the file in bytes.
+    sha256 : str
+        Hex digest of the file's content.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest_path, "wb") as f:
+            while chunk := src.read(chunk_size):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(max_size)
+                _write_chunk(f, digest, chunk)
+    except BaseException:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    return size, digest.hexdigest()
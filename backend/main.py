@@ -1,18 +1,39 @@
-from fastapi import FastAPI
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+from sqlalchemy import text
 
+from core import lookups, metrics
 from core.config import settings
 from core.logging import setup_logging
-from routers import auth, document, user
+from db.database import SessionLocal
+from routers import auth, document, upload, user
 
 setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        lookups.load()
+    except Exception as e:
+        # Loaded on first use instead, e.g. before migrations ran
+        logging.warning(f"Could not load lookup tables at startup: {e}")
+    yield
+
+
 app = FastAPI(
     title="Grain Insight Clifton API",
     description="api to analyze geo files",
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -23,8 +44,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Labelled by router tag, paths with ids would explode the label set
+    route = request.scope.get("route")
+    tags = getattr(route, "tags", None)
+    metrics.REQUEST_SECONDS.labels(
+        tags[0] if tags else "other", request.method, response.status_code
+    ).observe(time.perf_counter() - start)
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus metrics, of the analysis workers too if they share METRICS_DIR"""
+    return Response(metrics.exposition(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/ready", include_in_schema=False)
+def get_ready():
+    """
+    Readiness probe: the database answers and the lookup tables are loaded.
+    Analysis models live in the workers, see /ready of tasks/worker.py.
+    """
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+        lookups.statuses.id("Processed")
+    except Exception as e:
+        return JSONResponse({"ready": False, "detail": str(e)}, status_code=503)
+    finally:
+        db.close()
+    return {"ready": True}
+
+
 app.include_router(auth.router, prefix=settings.API_PREFIX)
 app.include_router(document.router, prefix=settings.API_PREFIX)
+app.include_router(upload.router, prefix=settings.API_PREFIX)
 app.include_router(user.router, prefix=settings.API_PREFIX)
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ from .document import Document
 from .job import Job
 from .role import Role
 from .status import Status
+from .upload_session import UploadSession
 from .user import User
 
-__all__ = ["Role", "Status", "User", "Document", "Job"]
+__all__ = ["Role", "Status", "User", "Document", "Job", "UploadSession"]
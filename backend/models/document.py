@@ -19,6 +19,8 @@ class Document(Base):
     stored_filename = Column(String(255), nullable=False)
     file_path = Column(String(512), nullable=False)
     content_type = Column(String(100), nullable=False)
+    # sha256 of the file, identifies identical uploads
+    content_hash = Column(String(64), nullable=True, index=True)
     uploaded_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String
 from sqlalchemy.sql import func
 
 from db.database import Base
@@ -9,7 +9,19 @@ class Job(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     job_id = Column(String, index=True, unique=True)
-    status_id = Column(Integer, ForeignKey("statuses.id"), nullable=False)
+    status_id = Column(Integer, ForeignKey("statuses.id"), nullable=False, index=True)
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    # Set for jobs queued together by a bulk upload
+    batch_id = Column(String(36), nullable=True, index=True)
+    worker_id = Column(String(100), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # Reported by the worker while running, streamed to clients
+    stage = Column(String(50), nullable=True)
+    progress = Column(Integer, nullable=False, default=0, server_default="0")
+    # Seconds spent in each analysis stage, see core/progress.py
+    stage_timings = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # Refreshed while the job runs, a job without one for long is requeued
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
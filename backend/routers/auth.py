@@ -2,10 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session, joinedload
 
-from core.dependencies import get_current_user
+from core import lookups
+from core.dependencies import Principal, get_current_user
 from core.security import create_access_token, verify_password
 from db.database import get_db
-from models.status import Status
 from models.user import User
 from schemas.auth import LoginResponse, UserInfo
 
@@ -45,22 +45,28 @@ async def login(
         )
 
     # 4. Check user status - query from database
-    status_active = db.query(Status).filter(Status.name == "Active").first()
-
-    if not status_active:
+    try:
+        status_active_id = lookups.statuses.id("Active")
+    except LookupError:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Active status not found in database",
         )
 
-    if user.status_id != status_active.id:
+    if user.status_id != status_active_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Account is not active"
         )
 
     # 5. Generate JWT token
     access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email, "role_id": user.role_id}
+        data={
+            "sub": str(user.id),
+            "email": user.email,
+            "role_id": user.role_id,
+            "role_name": user.role.name if user.role else None,
+            "status_id": user.status_id,
+        }
     )
 
     # 6. Return token and user information with role_name
@@ -80,7 +86,7 @@ async def login(
 
 
 @router.get("/me", response_model=UserInfo)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+def get_current_user_info(current_user: Principal = Depends(get_current_user)):
     """Get current authenticated user information"""
     return UserInfo(
         id=current_user.id,
@@ -88,6 +94,6 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
         last_name=current_user.last_name,
         email=current_user.email,
         role_id=current_user.role_id,
-        role_name=current_user.role.name if current_user.role else None,
+        role_name=current_user.role_name,
         status_id=current_user.status_id,
     )
@@ -1,24 +1,59 @@
+import asyncio
+import io
+import json
+import logging
+import mimetypes
 import os
 import uuid
 import zipfile
-from io import BytesIO
-
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+)
 from fastapi.responses import FileResponse, StreamingResponse
-from sqlalchemy.orm import Session
-
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+from core import lookups
+from core.archive import (
+    ARCHIVE_SUFFIX,
+    RESULT_ARCHIVE_NAMES,
+    is_complete,
+    iter_zip,
+    iter_zip_cached,
+    prefetch,
+    result_members,
+)
 from core.config import settings
-from core.dependencies import get_current_user
-from db.database import get_db
+from core.dependencies import (
+    Principal,
+    get_current_user,
+    get_current_user_or_token,
+)
+from core.uploads import UploadTooLarge, read_chunks, save_stream, save_upload
+from db.database import SessionLocal, get_db
 from models.document import Document
-from models.status import Status
-from models.user import User
+from models.job import Job
 from schemas.document import (
+    BulkUploadResponse,
+    BulkUploadSkipped,
+    DocumentBatchDownloadRequest,
     DocumentResponse,
     DocumentStatusResponse,
     DocumentUploadResponse,
 )
-from tasks.document_tasks import process_document
+from tasks.job_queue import enqueue_document, enqueue_documents
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
@@ -29,10 +64,32 @@ def get_result_file_path(document_id: int, suffix: str) -> str:
     return f"storage/analyze_results/{document_id}/document_{document_id}{suffix}"
 
 
+def get_result_file(document: Document, suffix: str) -> Optional[str]:
+    """
+    Get a result file of a processed document, rendering images that the
+    analysis didn't write on first request. None if it isn't available.
+    """
+    file_path = get_result_file_path(document.id, suffix)
+    if os.path.exists(file_path):
+        return file_path
+
+    # Imported here so the API only loads the plotting stack when rendering
+    from core import artifacts
+
+    try:
+        path = artifacts.render(
+            get_result_file_path(document.id, ""), suffix, document.file_path
+        )
+    except Exception as e:
+        logging.error(f"Failed to render {suffix} for document {document.id}: {e}")
+        return None
+    return str(path) if path else None
+
+
 @router.get("", response_model=list[DocumentResponse])
 def list_documents(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     documents = (
         db.query(Document)
@@ -47,10 +104,11 @@ def list_documents(
 def get_document_status(
     document_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     document = (
         db.query(Document)
+        .options(joinedload(Document.status))
         .filter(Document.id == document_id, Document.user_id == current_user.id)
         .first()
     )
@@ -66,57 +124,228 @@ def get_document_status(
     )
 
 
-@router.post("/upload", response_model=DocumentUploadResponse)
-async def upload_document(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+# Document statuses after which nothing changes anymore
+FINAL_STATUSES = ("Processed", "Error", "Uploaded Failed")
+
+
+def _processing_states(document_ids: list) -> dict:
+    """
+    Status of documents and progress of their latest job, in one query.
+    Documents that don't exist are left out.
+    """
+    latest = (
+        select(func.max(Job.id).label("job_id"))
+        .where(Job.document_id.in_(document_ids))
+        .group_by(Job.document_id)
+        .subquery()
+    )
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Document.id, Document.status_id, Job.stage, Job.progress)
+            .outerjoin(
+                Job,
+                (Job.document_id == Document.id) & Job.id.in_(select(latest.c.job_id)),
+            )
+            .filter(Document.id.in_(document_ids))
+            .all()
+        )
+    finally:
+        db.close()
+    return {
+        row.id: {
+            "id": row.id,
+            "status": lookups.statuses.name(row.status_id),
+            "stage": row.stage,
+            "progress": row.progress or 0,
+        }
+        for row in rows
+    }
+
+
+class StatusPoller:
+    """
+    Polls the processing state of every document followed over server-sent
+    events, for all streams of this process at once: one query every
+    SSE_POLL_INTERVAL however many streams are open. Runs while there are
+    subscribers.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._task = None
+
+    def subscribe(self, document_id: int) -> asyncio.Queue:
+        """
+        Queue receiving the state of the document after every poll, None
+        once it is gone. Only the latest state is kept.
+        """
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers[document_id].add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, document_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(document_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[document_id]
+
+    async def _run(self):
+        while self._subscribers:
+            document_ids = list(self._subscribers)
+            try:
+                states = await run_in_threadpool(_processing_states, document_ids)
+            except Exception as e:
+                logging.error(f"Failed to poll document states: {e}")
+            else:
+                for document_id in document_ids:
+                    for queue in list(self._subscribers.get(document_id, ())):
+                        if queue.full():
+                            queue.get_nowait()
+                        queue.put_nowait(states.get(document_id))
+            await asyncio.sleep(settings.SSE_POLL_INTERVAL)
+
+
+_status_poller = StatusPoller()
+_NO_UPDATE = object()
+
+
+async def _status_events(request: Request, document_id: int):
+    """
+    Server-sent events with the processing state of a document.
+
+    States come from the shared StatusPoller, an event is only sent when the
+    state changed, plus a comment line now and then so proxies keep the
+    connection open. Ends once the document reached a final status or the
+    client went away.
+    """
+    yield f"retry: {int(settings.SSE_POLL_INTERVAL * 1000)}\n\n"
+    queue = _status_poller.subscribe(document_id)
+    loop = asyncio.get_running_loop()
+    try:
+        last = None
+        sent_at = loop.time()
+        while not await request.is_disconnected():
+            try:
+                state = await asyncio.wait_for(
+                    queue.get(), timeout=settings.SSE_KEEPALIVE_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                state = _NO_UPDATE
+            if state is None:
+                return
+            if state is not _NO_UPDATE and state != last:
+                last = state
+                sent_at = loop.time()
+                yield f"event: status\ndata: {json.dumps(state)}\n\n"
+                if state["status"] in FINAL_STATUSES:
+                    return
+            elif loop.time() - sent_at >= settings.SSE_KEEPALIVE_INTERVAL:
+                sent_at = loop.time()
+                yield ": keepalive\n\n"
+    finally:
+        _status_poller.unsubscribe(document_id, queue)
+
+
+@router.get("/{document_id}/events")
+def stream_document_status(
+    document_id: int,
+    request: Request,
+    current_user: Principal = Depends(get_current_user_or_token),
 ):
+    """
+    Follow the processing of a document as server-sent events, instead of
+    polling GET /documents/{id}. Each `status` event carries the document's
+    status and the stage and progress (0-100) reported by its job.
+
+    EventSource can't set headers, so the token may also be passed as the
+    `token` query parameter.
+    """
+    # Not get_db, its session would be held for as long as the stream is open
+    db = SessionLocal()
+    try:
+        document = (
+            db.query(Document.id)
+            .filter(Document.id == document_id, Document.user_id == current_user.id)
+            .first()
+        )
+    finally:
+        db.close()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return StreamingResponse(
+        _status_events(request, document_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def check_file_type(filename: str) -> str:
+    """Return the file's extension, rejecting types that aren't allowed."""
     allowed_extensions = set(
         ext.strip() for ext in settings.ALLOWED_EXTENSIONS.split(",")
     )
-    file_ext = os.path.splitext(file.filename)[1].lower()
+    file_ext = os.path.splitext(filename)[1].lower()
 
     if file_ext not in allowed_extensions:
         raise HTTPException(
             status_code=400,
             detail=f"File type '{file_ext}' not allowed. Allowed types: {settings.ALLOWED_EXTENSIONS}",
         )
+    return file_ext
 
-    contents = await file.read()
-    file_size = len(contents)
 
-    if file_size > settings.MAX_FILE_SIZE:
-        max_size_mb = settings.MAX_FILE_SIZE / 1024 / 1024
+def check_file_size(file_size: int, max_size: int = None):
+    """Reject files larger than max_size, by default MAX_FILE_SIZE."""
+    max_size = settings.MAX_FILE_SIZE if max_size is None else max_size
+    if file_size > max_size:
+        max_size_mb = max_size / 1024 / 1024
         raise HTTPException(
             status_code=400,
             detail=f"File size ({file_size / 1024 / 1024:.2f}MB) exceeds maximum allowed size ({max_size_mb}MB)",
         )
 
+
+def new_upload_path(file_ext: str) -> tuple[str, str]:
+    """Stored filename and path for a new upload."""
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
     stored_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = os.path.join(settings.UPLOAD_DIR, stored_filename)
+    return stored_filename, os.path.join(settings.UPLOAD_DIR, stored_filename)
 
-    try:
-        with open(file_path, "wb") as buffer:
-            buffer.write(contents)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
 
-    uploaded_status = db.query(Status).filter(Status.name == "Uploaded").first()
+def create_document(
+    db: Session,
+    user: Principal,
+    original_filename: str,
+    stored_filename: str,
+    file_path: str,
+    content_type: str,
+    content_hash: str,
+) -> Document:
+    """
+    Add the Document for a saved upload and queue its analysis. The file is
+    removed if the document can't be created.
+    """
 
     document = Document(
-        user_id=current_user.id,
-        original_filename=file.filename,
+        user_id=user.id,
+        original_filename=original_filename,
         stored_filename=stored_filename,
         file_path=file_path,
-        content_type=file.content_type,
-        status_id=uploaded_status.id,
+        content_type=content_type,
+        content_hash=content_hash,
+        status_id=lookups.statuses.id("Uploaded"),
     )
     try:
         db.add(document)
+        db.flush()
+        # Picked up by the analysis workers (tasks/worker.py)
+        enqueue_document(db, document.id)
         db.commit()
         db.refresh(document)
     except Exception as e:
@@ -124,8 +353,58 @@ async def upload_document(
             os.remove(file_path)
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return document
+
+
+@router.post("/upload", response_model=DocumentUploadResponse)
+async def upload_document(
+    request: Request,
+    filename: str = Query(..., description="Name of the uploaded file"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Upload one image, sent as the raw request body. The body is written to
+    disk as it arrives, and the upload rejected before that if its
+    Content-Length is too large.
+    """
+    file_ext = check_file_type(filename)
+
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit():
+        check_file_size(int(content_length))
 
-    background_tasks.add_task(process_document, document.id)
+    stored_filename, file_path = new_upload_path(file_ext)
+
+    try:
+        file_size, content_hash = await save_upload(
+            request.stream(), file_path, settings.MAX_FILE_SIZE
+        )
+    except UploadTooLarge:
+        max_size_mb = settings.MAX_FILE_SIZE / 1024 / 1024
+        raise HTTPException(
+            status_code=400,
+            detail=f"File size exceeds maximum allowed size ({max_size_mb}MB)",
+        )
+    except ClientDisconnect:
+        raise HTTPException(status_code=400, detail="Upload interrupted")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+
+    if file_size == 0:
+        os.remove(file_path)
+        raise HTTPException(status_code=400, detail="File is empty")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    document = create_document(
+        db,
+        current_user,
+        filename,
+        stored_filename,
+        file_path,
+        content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        content_hash,
+    )
 
     return DocumentUploadResponse(
         id=document.id,
@@ -135,13 +414,232 @@ async def upload_document(
     )
 
 
+def _too_many_files() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Too many files, at most {settings.BULK_UPLOAD_MAX_FILES} per upload",
+    )
+
+
+def _too_large() -> HTTPException:
+    max_size_mb = settings.BULK_UPLOAD_MAX_BYTES / 1024 / 1024
+    return HTTPException(
+        status_code=413,
+        detail=f"Upload too large, at most {max_size_mb:.0f}MB of files uncompressed",
+    )
+
+
+def _save_archive_members(
+    fileobj, archive_name: str, files_left: int, bytes_left: int
+) -> tuple[list, list]:
+    """
+    Save the images inside an uploaded ZIP archive, blocking.
+
+    The members are checked against files_left and bytes_left, what the rest
+    of the upload may still add, before anything is extracted. Sizes come
+    from the archive's directory, zipfile never reads past them.
+
+    Returns
+    -------
+    saved : list of dict
+        Fields of the documents to create, plus the file size.
+    skipped : list of BulkUploadSkipped
+        Members that were rejected, and why.
+
+    Raises
+    ------
+    HTTPException
+        413 if the archive holds too many images, or too many bytes of them.
+    """
+    saved, skipped = [], []
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        return saved, [BulkUploadSkipped(filename=archive_name, reason="Invalid ZIP")]
+
+    accepted = []
+    for info in archive.infolist():
+        filename = os.path.basename(info.filename)
+        # Folders and metadata that archivers add
+        if info.is_dir() or info.filename.startswith("__MACOSX/"):
+            continue
+        if filename.startswith("."):
+            continue
+        try:
+            file_ext = check_file_type(filename)
+            check_file_size(info.file_size)
+        except HTTPException as e:
+            skipped.append(BulkUploadSkipped(filename=info.filename, reason=e.detail))
+            continue
+        accepted.append((info, filename, file_ext))
+
+    if len(accepted) > files_left:
+        raise _too_many_files()
+    if sum(info.file_size for info, _, _ in accepted) > bytes_left:
+        raise _too_large()
+
+    try:
+        for info, filename, file_ext in accepted:
+            stored_filename, file_path = new_upload_path(file_ext)
+            try:
+                with archive.open(info) as member:
+                    file_size, content_hash = save_stream(
+                        member, file_path, settings.MAX_FILE_SIZE
+                    )
+            except (UploadTooLarge, zipfile.BadZipFile, OSError) as e:
+                skipped.append(BulkUploadSkipped(filename=info.filename, reason=str(e)))
+                continue
+
+            saved.append(
+                {
+                    "original_filename": filename,
+                    "stored_filename": stored_filename,
+                    "file_path": file_path,
+                    "content_type": mimetypes.guess_type(filename)[0]
+                    or "application/octet-stream",
+                    "content_hash": content_hash,
+                    "file_size": file_size,
+                }
+            )
+    except BaseException:
+        for fields in saved:
+            if os.path.exists(fields["file_path"]):
+                os.remove(fields["file_path"])
+        raise
+    return saved, skipped
+
+
+@router.post("/upload/bulk", response_model=BulkUploadResponse)
+async def upload_documents(
+    files: list[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Upload many images, or ZIP archives of images, at once. All documents
+    are created in one transaction and analyzed as one batch. Files that
+    can't be accepted are skipped and reported.
+    """
+    saved, skipped = [], []
+    try:
+        for file in files:
+            files_left = settings.BULK_UPLOAD_MAX_FILES - len(saved)
+            bytes_left = settings.BULK_UPLOAD_MAX_BYTES - sum(
+                fields["file_size"] for fields in saved
+            )
+            if os.path.splitext(file.filename)[1].lower() == ".zip":
+                members, rejected = await run_in_threadpool(
+                    _save_archive_members,
+                    file.file,
+                    file.filename,
+                    files_left,
+                    bytes_left,
+                )
+                saved += members
+                skipped += rejected
+            else:
+                try:
+                    file_ext = check_file_type(file.filename)
+                    if file.size is not None:
+                        check_file_size(file.size)
+                except HTTPException as e:
+                    skipped.append(
+                        BulkUploadSkipped(filename=file.filename, reason=e.detail)
+                    )
+                    continue
+                if files_left < 1:
+                    raise _too_many_files()
+                if file.size is not None and file.size > bytes_left:
+                    raise _too_large()
+
+                stored_filename, file_path = new_upload_path(file_ext)
+                try:
+                    file_size, content_hash = await save_upload(
+                        read_chunks(file), file_path, settings.MAX_FILE_SIZE
+                    )
+                except UploadTooLarge as e:
+                    skipped.append(
+                        BulkUploadSkipped(filename=file.filename, reason=str(e))
+                    )
+                    continue
+                saved.append(
+                    {
+                        "original_filename": file.filename,
+                        "stored_filename": stored_filename,
+                        "file_path": file_path,
+                        "content_type": file.content_type,
+                        "content_hash": content_hash,
+                        "file_size": file_size,
+                    }
+                )
+                # Size unknown until saved, it is removed below
+                if file_size > bytes_left:
+                    raise _too_large()
+    except BaseException:
+        for fields in saved:
+            if os.path.exists(fields["file_path"]):
+                os.remove(fields["file_path"])
+        raise
+
+    if not saved:
+        raise HTTPException(
+            status_code=400,
+            detail="No files could be uploaded: "
+            + "; ".join(f"{s.filename}: {s.reason}" for s in skipped),
+        )
+
+    batch_id = str(uuid.uuid4())
+
+    documents = [
+        Document(
+            user_id=current_user.id,
+            original_filename=fields["original_filename"],
+            stored_filename=fields["stored_filename"],
+            file_path=fields["file_path"],
+            content_type=fields["content_type"],
+            content_hash=fields["content_hash"],
+            status_id=lookups.statuses.id("Uploaded"),
+        )
+        for fields in saved
+    ]
+    try:
+        db.add_all(documents)
+        db.flush()
+        enqueue_documents(
+            db,
+            [(d.id, fields["file_size"]) for d, fields in zip(documents, saved)],
+            batch_id,
+        )
+        db.commit()
+    except Exception as e:
+        for fields in saved:
+            if os.path.exists(fields["file_path"]):
+                os.remove(fields["file_path"])
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    return BulkUploadResponse(
+        batch_id=batch_id,
+        documents=[
+            DocumentUploadResponse(
+                id=document.id,
+                filename=document.original_filename,
+                status="success",
+                message="File uploaded successfully",
+            )
+            for document in documents
+        ],
+        skipped=skipped,
+    )
+
+
 # Download endpoints
 
 
 def _get_document_or_404(
     document_id: int,
     db: Session,
-    current_user: User,
+    current_user: Principal,
     require_processed: bool = True,
 ) -> Document:
     """Helper to get document with common validation."""
@@ -154,7 +652,7 @@ def _get_document_or_404(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    if require_processed and document.status.name != "Processed":
+    if require_processed and document.status_id != lookups.statuses.id("Processed"):
         raise HTTPException(status_code=400, detail="Document not processed yet")
 
     return document
@@ -164,14 +662,14 @@ def _get_document_or_404(
 def download_csv(
     document_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Download summary CSV file."""
     document = _get_document_or_404(document_id, db, current_user)
 
-    file_path = get_result_file_path(document_id, "_summary.csv")
+    file_path = get_result_file(document, "_summary.csv")
 
-    if not os.path.exists(file_path):
+    if file_path is None:
         raise HTTPException(status_code=404, detail="CSV file not found")
 
     filename = f"{os.path.splitext(document.original_filename)[0]}_summary.csv"
@@ -188,14 +686,14 @@ def download_csv(
 def download_mask(
     document_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Download mask PNG file."""
     document = _get_document_or_404(document_id, db, current_user)
 
-    file_path = get_result_file_path(document_id, "_mask.png")
+    file_path = get_result_file(document, "_mask.png")
 
-    if not os.path.exists(file_path):
+    if file_path is None:
         raise HTTPException(status_code=404, detail="Mask image not found")
 
     filename = f"{os.path.splitext(document.original_filename)[0]}_mask.png"
@@ -212,14 +710,14 @@ def download_mask(
 def download_grains(
     document_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Download grains visualization image."""
     document = _get_document_or_404(document_id, db, current_user)
 
-    file_path = get_result_file_path(document_id, "_grains.jpg")
+    file_path = get_result_file(document, "_grains.jpg")
 
-    if not os.path.exists(file_path):
+    if file_path is None:
         raise HTTPException(status_code=404, detail="Grains image not found")
 
     filename = f"{os.path.splitext(document.original_filename)[0]}_grains.jpg"
@@ -235,14 +733,14 @@ def download_grains(
 def download_histogram(
     document_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Download size histogram image."""
     document = _get_document_or_404(document_id, db, current_user)
 
-    file_path = get_result_file_path(document_id, "_summary.jpg")
+    file_path = get_result_file(document, "_summary.jpg")
 
-    if not os.path.exists(file_path):
+    if file_path is None:
         raise HTTPException(status_code=404, detail="Histogram image not found")
 
     filename = f"{os.path.splitext(document.original_filename)[0]}_histogram.jpg"
@@ -258,14 +756,14 @@ def download_histogram(
 def download_geojson(
     document_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Download GeoJSON file."""
     document = _get_document_or_404(document_id, db, current_user)
 
-    file_path = get_result_file_path(document_id, "_grains.geojson")
+    file_path = get_result_file(document, "_grains.geojson")
 
-    if not os.path.exists(file_path):
+    if file_path is None:
         raise HTTPException(status_code=404, detail="GeoJSON file not found")
 
     filename = f"{os.path.splitext(document.original_filename)[0]}_grains.geojson"
@@ -281,14 +779,14 @@ def download_geojson(
 def download_mask_preview(
     document_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Download mask preview image (JPG)."""
     document = _get_document_or_404(document_id, db, current_user)
 
-    file_path = get_result_file_path(document_id, "_mask2.jpg")
+    file_path = get_result_file(document, "_mask2.jpg")
 
-    if not os.path.exists(file_path):
+    if file_path is None:
         raise HTTPException(status_code=404, detail="Mask preview not found")
 
     filename = f"{os.path.splitext(document.original_filename)[0]}_mask_preview.jpg"
@@ -304,42 +802,116 @@ def download_mask_preview(
 def download_all(
     document_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Download all result files as ZIP."""
     document = _get_document_or_404(document_id, db, current_user)
 
     base_name = os.path.splitext(document.original_filename)[0]
+    zip_filename = f"{base_name}_results.zip"
+    headers = {"Content-Disposition": f'attachment; filename="{zip_filename}"'}
 
-    # All possible result files
-    result_files = [
-        ("_grains.jpg", f"{base_name}_grains.jpg"),
-        ("_grains.geojson", f"{base_name}_grains.geojson"),
-        ("_summary.csv", f"{base_name}_summary.csv"),
-        ("_summary.jpg", f"{base_name}_histogram.jpg"),
-        ("_mask.png", f"{base_name}_mask.png"),
-        ("_mask2.jpg", f"{base_name}_mask_preview.jpg"),
-    ]
+    # Served with Range support once built
+    archive_path = get_result_file_path(document_id, ARCHIVE_SUFFIX)
+    if os.path.exists(archive_path):
+        return FileResponse(
+            path=archive_path, media_type="application/zip", headers=headers
+        )
 
-    files_to_zip = []
-    for suffix, archive_name in result_files:
-        file_path = get_result_file_path(document_id, suffix)
-        if os.path.exists(file_path):
-            files_to_zip.append((file_path, archive_name))
+    # Render images the analysis left for first download
+    for suffix in RESULT_ARCHIVE_NAMES:
+        get_result_file(document, suffix)
 
-    if not files_to_zip:
+    members = result_members(get_result_file_path(document_id, ""), base_name)
+    if not members:
         raise HTTPException(status_code=404, detail="No result files found")
 
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for file_path, archive_name in files_to_zip:
-            zip_file.write(file_path, archive_name)
+    # Streamed as it is built, and cached for the next download unless a
+    # file is missing, so it is retried then
+    if is_complete(members):
+        chunks = iter_zip_cached(members, archive_path)
+    else:
+        chunks = iter_zip(members)
+    return StreamingResponse(chunks, media_type="application/zip", headers=headers)
+
+
+def _iter_batch_zip(documents: list[Document]):
+    """
+    Archive with a folder of result files per document and a summary CSV
+    merged across all of them, with a document_id column.
+    """
+    # Imported here, pandas alone takes about half the startup of the API
+    import pandas as pd
+
+    members = []
+    summary_ids = {}
+    for document in documents:
+        base_name = os.path.splitext(document.original_filename)[0]
+        folder = f"{document.id}_{base_name}/"
+        for path, arcname in result_members(
+            get_result_file_path(document.id, ""), base_name, folder
+        ):
+            members.append((path, arcname))
+            if str(path).endswith("_summary.csv"):
+                summary_ids[arcname] = document.id
+
+    summaries = []
+
+    def collect(prefetched):
+        for data, arcname in prefetched:
+            document_id = summary_ids.get(arcname)
+            if document_id is not None and data.strip():
+                summary = pd.read_csv(io.BytesIO(data), index_col=0)
+                summary.insert(0, "document_id", document_id)
+                summaries.append(summary)
+            yield data, arcname
+
+    def merged():
+        # Runs once every member has been read
+        if summaries:
+            yield pd.concat(summaries).to_csv().encode(), "summary.csv"
+
+    def all_members():
+        yield from collect(prefetch(members, settings.ARCHIVE_READ_WORKERS))
+        yield from merged()
+
+    yield from iter_zip(all_members())
+
+
+@router.post("/download")
+def download_batch(
+    request: DocumentBatchDownloadRequest,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Download the results of several processed documents as one ZIP."""
+    query = db.query(Document).filter(
+        Document.user_id == current_user.id,
+        Document.status_id == lookups.statuses.id("Processed"),
+    )
+    if request.document_ids is not None:
+        query = query.filter(Document.id.in_(request.document_ids))
+    if request.uploaded_after is not None:
+        query = query.filter(Document.uploaded_at >= request.uploaded_after)
+    if request.uploaded_before is not None:
+        query = query.filter(Document.uploaded_at < request.uploaded_before)
 
-    zip_buffer.seek(0)
-    zip_filename = f"{base_name}_results.zip"
+    documents = (
+        query.order_by(Document.uploaded_at)
+        .limit(settings.BATCH_DOWNLOAD_MAX_DOCUMENTS + 1)
+        .all()
+    )
+    if not documents:
+        raise HTTPException(status_code=404, detail="No processed documents found")
+    if len(documents) > settings.BATCH_DOWNLOAD_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many documents, at most {settings.BATCH_DOWNLOAD_MAX_DOCUMENTS} per download",
+        )
 
+    zip_filename = f"results_{datetime.now(timezone.utc):%Y%m%d_%H%M%S}.zip"
     return StreamingResponse(
-        zip_buffer,
+        _iter_batch_zip(documents),
         media_type="application/zip",
         headers={"Content-Disposition": f'attachment; filename="{zip_filename}"'},
     )
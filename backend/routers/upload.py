@@ -0,0 +1,274 @@
+import hashlib
+import logging
+import math
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+from core.config import settings
+from core.dependencies import Principal, get_current_user
+from core.uploads import CHUNK_SIZE
+from db.database import get_db
+from models.upload_session import UploadSession
+from routers.document import (
+    check_file_size,
+    check_file_type,
+    create_document,
+    new_upload_path,
+)
+from schemas.document import DocumentUploadResponse
+from schemas.upload import (
+    UploadChunkResponse,
+    UploadSessionCreate,
+    UploadSessionResponse,
+)
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+
+def _chunk_dir(session: UploadSession) -> str:
+    return os.path.join(settings.UPLOAD_DIR, ".sessions", session.session_id)
+
+
+def _total_chunks(session: UploadSession) -> int:
+    return max(math.ceil(session.total_size / session.chunk_size), 1)
+
+
+def _chunk_length(session: UploadSession, index: int) -> int:
+    """Expected size of a chunk, only the last one may be shorter."""
+    if index < _total_chunks(session) - 1:
+        return session.chunk_size
+    return session.total_size - index * session.chunk_size
+
+
+def _received_chunks(session: UploadSession) -> list[int]:
+    chunk_dir = _chunk_dir(session)
+    if not os.path.isdir(chunk_dir):
+        return []
+    return sorted(
+        int(name[: -len(".part")])
+        for name in os.listdir(chunk_dir)
+        if name.endswith(".part")
+    )
+
+
+def _session_response(session: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        session_id=session.session_id,
+        filename=session.original_filename,
+        size=session.total_size,
+        chunk_size=session.chunk_size,
+        total_chunks=_total_chunks(session),
+        received_chunks=_received_chunks(session),
+        document_id=session.document_id,
+    )
+
+
+def _get_session_or_404(
+    session_id: str, db: Session, current_user: Principal
+) -> UploadSession:
+    session = (
+        db.query(UploadSession)
+        .filter(
+            UploadSession.session_id == session_id,
+            UploadSession.user_id == current_user.id,
+        )
+        .first()
+    )
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+
+def _remove_expired_sessions(db: Session):
+    """Drop sessions that were never completed, together with their chunks."""
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        hours=settings.UPLOAD_SESSION_EXPIRE_HOURS
+    )
+    expired = (
+        db.query(UploadSession)
+        .filter(UploadSession.document_id.is_(None), UploadSession.created_at < cutoff)
+        .all()
+    )
+    for session in expired:
+        shutil.rmtree(_chunk_dir(session), ignore_errors=True)
+        db.delete(session)
+    if expired:
+        db.commit()
+        logging.info(f"Removed {len(expired)} expired upload session(s)")
+
+
+def _assemble(session: UploadSession, file_path: str) -> str:
+    """Concatenate the chunks into file_path and return its sha256."""
+    digest = hashlib.sha256()
+    chunk_dir = _chunk_dir(session)
+    with open(file_path, "wb") as dest:
+        for index in range(_total_chunks(session)):
+            with open(os.path.join(chunk_dir, f"{index}.part"), "rb") as part:
+                for block in iter(lambda: part.read(CHUNK_SIZE), b""):
+                    digest.update(block)
+                    dest.write(block)
+    return digest.hexdigest()
+
+
+@router.post("", response_model=UploadSessionResponse)
+def create_upload_session(
+    request: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Start a resumable upload. Chunks are then sent with PUT, in any order."""
+    check_file_type(request.filename)
+    check_file_size(request.size, settings.RESUMABLE_UPLOAD_MAX_SIZE)
+    if request.size <= 0:
+        raise HTTPException(status_code=400, detail="File is empty")
+
+    _remove_expired_sessions(db)
+
+    session = UploadSession(
+        session_id=str(uuid.uuid4()),
+        user_id=current_user.id,
+        original_filename=request.filename,
+        content_type=request.content_type,
+        total_size=request.size,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    os.makedirs(_chunk_dir(session), exist_ok=True)
+
+    return _session_response(session)
+
+
+@router.get("/{session_id}", response_model=UploadSessionResponse)
+def get_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Upload progress, to find the chunks still missing after a failure."""
+    session = _get_session_or_404(session_id, db, current_user)
+    return _session_response(session)
+
+
+@router.put("/{session_id}/chunks/{index}", response_model=UploadChunkResponse)
+async def upload_chunk(
+    session_id: str,
+    index: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Store one chunk, sent as the raw request body. Sending a chunk again
+    replaces it, so failed chunks can simply be retried.
+    """
+    session = _get_session_or_404(session_id, db, current_user)
+    if session.document_id is not None:
+        raise HTTPException(status_code=409, detail="Upload already completed")
+    if not 0 <= index < _total_chunks(session):
+        raise HTTPException(status_code=400, detail="Chunk index out of range")
+
+    expected = _chunk_length(session, index)
+    chunk_path = os.path.join(_chunk_dir(session), f"{index}.part")
+    # Written aside and renamed, so a broken transfer never looks complete
+    tmp_path = f"{chunk_path}.{uuid.uuid4().hex}.tmp"
+
+    size = 0
+    try:
+        f = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            async for data in request.stream():
+                size += len(data)
+                if size > expected:
+                    break
+                await run_in_threadpool(f.write, data)
+        except ClientDisconnect:
+            raise HTTPException(status_code=400, detail="Upload interrupted")
+        finally:
+            await run_in_threadpool(f.close)
+
+        if size != expected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Chunk {index} must be {expected} bytes",
+            )
+        os.replace(tmp_path, chunk_path)
+    finally:
+        # Left behind by a rejected chunk or a client that went away
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return UploadChunkResponse(index=index, size=size)
+
+
+@router.post("/{session_id}/complete", response_model=DocumentUploadResponse)
+async def complete_upload(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Assemble the chunks into a document and queue its analysis."""
+    session = _get_session_or_404(session_id, db, current_user)
+
+    if session.document_id is None:
+        missing = set(range(_total_chunks(session))) - set(_received_chunks(session))
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Missing chunks: {sorted(missing)}",
+            )
+
+        # Claim the session, so a retried request can't create a second document
+        claimed = (
+            db.query(UploadSession)
+            .filter(
+                UploadSession.id == session.id, UploadSession.completed_at.is_(None)
+            )
+            .update({UploadSession.completed_at: datetime.now(timezone.utc)})
+        )
+        db.commit()
+        if not claimed:
+            raise HTTPException(status_code=409, detail="Upload is being completed")
+
+        file_ext = check_file_type(session.original_filename)
+        stored_filename, file_path = new_upload_path(file_ext)
+        try:
+            content_hash = await run_in_threadpool(_assemble, session, file_path)
+            document = create_document(
+                db,
+                current_user,
+                session.original_filename,
+                stored_filename,
+                file_path,
+                session.content_type,
+                content_hash,
+            )
+        except Exception as e:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            session.completed_at = None
+            db.commit()
+            if isinstance(e, HTTPException):
+                raise
+            raise HTTPException(
+                status_code=500, detail=f"Failed to save file: {str(e)}"
+            )
+
+        session.document_id = document.id
+        db.commit()
+        shutil.rmtree(_chunk_dir(session), ignore_errors=True)
+
+    return DocumentUploadResponse(
+        id=session.document_id,
+        filename=session.original_filename,
+        status="success",
+        message="File uploaded successfully",
+    )
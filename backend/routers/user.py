@@ -3,7 +3,7 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from core.dependencies import require_admin
+from core.dependencies import invalidate_principal, require_admin
 from core.security import get_password_hash
 from db.database import get_db
 from models.user import User
@@ -101,6 +101,8 @@ def update_user(user_id: int, payload: UserUpdate, db: Session = Depends(get_db)
 
     db.commit()
     db.refresh(user)
+    # Role or status may have changed, don't serve the cached user anymore
+    invalidate_principal(user.id)
 
     return UserOut(
         id=user.id,
@@ -28,8 +28,26 @@ class DocumentUploadResponse(BaseModel):
     message: str
 
 
+class BulkUploadSkipped(BaseModel):
+    filename: str
+    reason: str
+
+
+class BulkUploadResponse(BaseModel):
+    batch_id: str
+    documents: list[DocumentUploadResponse]
+    skipped: list[BulkUploadSkipped]
+
+
 class DocumentStatusResponse(BaseModel):
     id: int
     filename: str
     status: StatusResponse
     error_message: Optional[str] = None
+
+
+class DocumentBatchDownloadRequest(BaseModel):
+    # Without any criteria, all processed documents of the user are included
+    document_ids: Optional[list[int]] = None
+    uploaded_after: Optional[datetime] = None
+    uploaded_before: Optional[datetime] = None
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int
+    content_type: str
+
+
+class UploadSessionResponse(BaseModel):
+    session_id: str
+    filename: str
+    size: int
+    chunk_size: int
+    total_chunks: int
+    # Chunks stored so far, by index
+    received_chunks: list[int]
+    document_id: Optional[int] = None
+
+
+class UploadChunkResponse(BaseModel):
+    index: int
+    size: int
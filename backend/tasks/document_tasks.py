@@ -1,12 +1,17 @@
 # tasks/document_tasks.py
 import gc
 import logging
+import os
+import time
 import traceback
 
-from core.grain_analysis import get_grain_analyzer
+from core import archive, lookups, metrics, result_cache
+from core.config import settings
+from core.grain_analysis import ANALYSIS_PARAMS, MODEL_FILES, get_grain_analyzer
+from core.progress import ProgressTracker
 from db.database import SessionLocal
 from models.document import Document
-from models.status import Status
+from tasks.job_queue import report_progress
 
 
 def process_document(document_id: int):
@@ -17,28 +22,84 @@ def process_document(document_id: int):
         document = db.query(Document).get(document_id)
 
         # Update status to 'Processing'
-        document.status_id = db.query(Status).filter_by(name="Processing").first().id
-        db.commit()
+        document.status_id = lookups.statuses.id("Processing")
+        report_progress(db, document_id, "starting", 0)
 
-        # Use singleton grain analyzer instance
-        analyzer = get_grain_analyzer()
+        output_prefix = f"storage/analyze_results/{document.id}/document_{document.id}"
+        # The result files are about to be rewritten
+        archive.discard_archive(output_prefix)
+        result_cache.unlink_results(output_prefix)
 
-        analyzer.analyze(
+        # Reuse the artifacts of an identical earlier analysis if there is one
+        key = result_cache.cache_key(
             document.file_path,
-            output_prefix=f"storage/analyze_results/{document.id}/document_{document.id}",
+            ANALYSIS_PARAMS,
+            MODEL_FILES,
+            image_hash=document.content_hash,
         )
+        entry = result_cache.lookup(key)
 
-        # Update status to 'Processed' and set result paths
-        processed = db.query(Status).filter_by(name="Processed").first()
+        if entry is not None:
+            logging.info(f"Reusing cached results {key} for document {document_id}")
+            report_progress(db, document_id, "restoring cached results")
+            result_cache.restore(entry, output_prefix)
+        else:
+            # Use singleton grain analyzer instance
+            analyzer = get_grain_analyzer()
+
+            def save_progress(stage, percent, timings):
+                try:
+                    report_progress(db, document_id, stage, percent, timings)
+                except Exception:
+                    db.rollback()
+                    raise
+
+            # Analysis stages are written at most every PROGRESS_REPORT_INTERVAL
+            tracker = ProgressTracker(
+                save_progress, interval=settings.PROGRESS_REPORT_INTERVAL
+            )
+            with metrics.ANALYSES_IN_PROGRESS.track_inprogress():
+                metrics.reset_peak_rss()
+                start = time.perf_counter()
+                grain_count = analyzer.analyze(
+                    document.file_path, output_prefix=output_prefix, progress=tracker
+                )
+                tracker.finish()
+            metrics.record_analysis(
+                tracker.timings, time.perf_counter() - start, grain_count
+            )
+            logging.info(f"Stage timings of document {document_id}: {tracker.timings}")
 
-        document.status_id = processed.id
+            try:
+                result_cache.store(key, output_prefix)
+            except Exception as e:
+                logging.warning(
+                    f"Failed to cache results of document {document_id}: {e}"
+                )
+
+        # Prebuild the download archive while everything is rendered anyway
+        if settings.EAGER_ARTIFACTS:
+            try:
+                base_name = os.path.splitext(document.original_filename)[0]
+                members = archive.result_members(output_prefix, base_name)
+                if archive.is_complete(members):
+                    archive.build_zip(
+                        members, f"{output_prefix}{archive.ARCHIVE_SUFFIX}"
+                    )
+            except Exception as e:
+                logging.warning(
+                    f"Failed to build archive of document {document_id}: {e}"
+                )
+
+        # Update status to 'Processed' and set result paths
+        report_progress(db, document_id, "done", 100)
+        document.status_id = lookups.statuses.id("Processed")
 
     except Exception as e:
         logging.error(f"❌ Error processing document {document_id}: {e}")
         traceback.print_exc()
         # Update status to 'Error'
-        failed = db.query(Status).filter_by(name="Error").first()
-        document.status_id = failed.id
+        document.status_id = lookups.statuses.id("Error")
 
     finally:
         db.commit()
@@ -0,0 +1,226 @@
+# tasks/job_queue.py
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from core import lookups
+from core.config import settings
+from models.document import Document
+from models.job import Job
+
+# Jobs share the status table with documents
+QUEUED = "Uploaded"
+RUNNING = "Processing"
+FAILED = "Error"
+
+
+def enqueue_document(db: Session, document_id: int) -> Job:
+    """Add an analysis job for a document. The caller commits."""
+    job = Job(
+        job_id=str(uuid.uuid4()),
+        status_id=lookups.statuses.id(QUEUED),
+        document_id=document_id,
+    )
+    db.add(job)
+    return job
+
+
+def enqueue_documents(db: Session, documents: list, batch_id: str) -> list[Job]:
+    """
+    Add analysis jobs for a batch of documents. The caller commits.
+
+    Jobs are claimed in insertion order, so documents are queued by file size:
+    images of similar size run back to back and small ones finish first.
+
+    Parameters
+    ----------
+    documents : list of (document_id, file_size)
+        Documents to analyze.
+    batch_id : str
+        Shared by all jobs of the batch.
+    """
+    status_id = lookups.statuses.id(QUEUED)
+    jobs = [
+        Job(
+            job_id=str(uuid.uuid4()),
+            status_id=status_id,
+            document_id=document_id,
+            batch_id=batch_id,
+        )
+        for document_id, _ in sorted(documents, key=lambda d: d[1])
+    ]
+    db.add_all(jobs)
+    return jobs
+
+
+def claim_next_job(db: Session, worker_id: str) -> Optional[Job]:
+    """
+    Atomically move the oldest queued job to running and return it.
+
+    The candidate row is locked with SKIP LOCKED where the database supports
+    it; the conditional UPDATE keeps the claim safe on SQLite as well.
+    """
+    queued_id = lookups.statuses.id(QUEUED)
+    running_id = lookups.statuses.id(RUNNING)
+
+    while True:
+        now = datetime.now(timezone.utc)
+        candidate = (
+            db.query(Job.id)
+            .filter(Job.status_id == queued_id)
+            .order_by(Job.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if candidate is None:
+            db.rollback()
+            return None
+
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == candidate.id, Job.status_id == queued_id)
+            .values(
+                status_id=running_id,
+                worker_id=worker_id,
+                attempts=Job.attempts + 1,
+                started_at=now,
+                heartbeat_at=now,
+                stage=None,
+                progress=0,
+                stage_timings=None,
+            )
+        ).rowcount
+        db.commit()
+
+        # Another worker got there first, try the next one
+        if claimed:
+            return db.get(Job, candidate.id)
+
+
+def report_progress(
+    db: Session,
+    document_id: int,
+    stage: str,
+    progress: Optional[int] = None,
+    timings: Optional[dict] = None,
+):
+    """
+    Record what the running job of a document is doing, for clients following
+    it (see routers/document.py:document_events). Commits.
+
+    Parameters
+    ----------
+    stage : str
+        Short name of the current step, e.g. "segmenting".
+    progress : int (optional)
+        Overall completion in percent. Left unchanged if not given.
+    timings : dict (optional)
+        Seconds spent in each stage so far. Left unchanged if not given.
+    """
+    values = {Job.stage: stage, Job.heartbeat_at: datetime.now(timezone.utc)}
+    if progress is not None:
+        values[Job.progress] = progress
+    if timings is not None:
+        values[Job.stage_timings] = timings
+    db.query(Job).filter(
+        Job.document_id == document_id,
+        Job.status_id == lookups.statuses.id(RUNNING),
+    ).update(values, synchronize_session=False)
+    db.commit()
+
+
+def _owned_by(job: Job):
+    """Filter for the attempt of a job a worker claimed, see claim_next_job()."""
+    return (
+        (Job.id == job.id)
+        & (Job.status_id == lookups.statuses.id(RUNNING))
+        & (Job.worker_id == job.worker_id)
+        & (Job.attempts == job.attempts)
+    )
+
+
+def heartbeat(db: Session, job: Job) -> bool:
+    """
+    Mark a running job as alive. Commits. False if the job was requeued
+    meanwhile, see requeue_stale_jobs().
+    """
+    updated = db.execute(
+        update(Job)
+        .where(_owned_by(job))
+        .values(heartbeat_at=datetime.now(timezone.utc))
+    ).rowcount
+    db.commit()
+    return bool(updated)
+
+
+def finish_job(db: Session, job: Job, status_id: int) -> bool:
+    """
+    Record the final status of a job. Commits. False, and nothing recorded,
+    if the job was requeued meanwhile: another attempt owns it now.
+    """
+    updated = db.execute(
+        update(Job)
+        .where(_owned_by(job))
+        .values(status_id=status_id, completed_at=datetime.now(timezone.utc))
+    ).rowcount
+    db.commit()
+    return bool(updated)
+
+
+def _requeue(db: Session, jobs: list, reason: str) -> int:
+    """
+    Requeue jobs left running by a worker that died. Commits.
+
+    Jobs that already used up JOB_MAX_ATTEMPTS are failed instead, together
+    with their document, so a poisoned image can't crash workers forever.
+    """
+    queued_id = lookups.statuses.id(QUEUED)
+    failed_id = lookups.statuses.id(FAILED)
+
+    for job in jobs:
+        exhausted = job.attempts >= settings.JOB_MAX_ATTEMPTS
+        job.status_id = failed_id if exhausted else queued_id
+        job.worker_id = None
+        db.query(Document).filter(Document.id == job.document_id).update(
+            {Document.status_id: job.status_id}
+        )
+        logging.warning(
+            f"Job {job.job_id} for document {job.document_id} {reason}, "
+            f"{'failed' if exhausted else 'requeued'}"
+        )
+    db.commit()
+    return len(jobs)
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    """
+    Requeue running jobs without a heartbeat for JOB_STALE_AFTER seconds,
+    see _requeue(). Workers send one every JOB_HEARTBEAT_INTERVAL however
+    long the analysis takes.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.JOB_STALE_AFTER)
+    stale = (
+        db.query(Job)
+        .filter(
+            Job.status_id == lookups.statuses.id(RUNNING),
+            func.coalesce(Job.heartbeat_at, Job.started_at) < cutoff,
+        )
+        .all()
+    )
+    return _requeue(db, stale, "was stale")
+
+
+def requeue_worker_jobs(db: Session, worker_id: str) -> int:
+    """Requeue the jobs a dead worker was running, see _requeue()."""
+    orphaned = (
+        db.query(Job)
+        .filter(
+            Job.status_id == lookups.statuses.id(RUNNING), Job.worker_id == worker_id
+        )
+        .all()
+    )
+    return _requeue(db, orphaned, f"lost its worker {worker_id}")
@@ -0,0 +1,291 @@
+# tasks/worker.py
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prometheus_client import CONTENT_TYPE_LATEST, multiprocess
+
+from core import metrics
+from core.config import settings
+from core.logging import setup_logging
+from db.database import SessionLocal
+from models.document import Document
+from models.job import Job
+from tasks.job_queue import (
+    claim_next_job,
+    finish_job,
+    heartbeat,
+    requeue_stale_jobs,
+    requeue_worker_jobs,
+)
+
+
+def worker_id_for(pid: int) -> str:
+    """Worker id recorded on the jobs a worker process claims."""
+    return f"{socket.gethostname()}:{pid}"
+
+
+def requeue_jobs(worker_id: str = None):
+    """
+    Requeue the jobs of a dead worker, or with no worker_id the stale ones.
+    Errors are logged, the supervisor keeps going.
+    """
+    db = SessionLocal()
+    try:
+        if worker_id is None:
+            requeue_stale_jobs(db)
+        else:
+            requeue_worker_jobs(db, worker_id)
+    except Exception as e:
+        db.rollback()
+        logging.error(f"Failed to requeue jobs of {worker_id or 'dead workers'}: {e}")
+    finally:
+        db.close()
+
+
+@contextmanager
+def keep_alive(job: Job):
+    """
+    Send heartbeats for a running job every JOB_HEARTBEAT_INTERVAL from a
+    background thread, so however long it runs it isn't taken for stale.
+    """
+    # Detached copy, the thread must not share the caller's session
+    claim = Job(id=job.id, worker_id=job.worker_id, attempts=job.attempts)
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+            db = SessionLocal()
+            try:
+                if not heartbeat(db, claim):
+                    logging.warning(f"Job {claim.id} was requeued while running")
+                    return
+            except Exception as e:
+                db.rollback()
+                logging.error(f"Heartbeat of job {claim.id} failed: {e}")
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job_id: int):
+    """Run the analysis for one claimed job and record its outcome."""
+    # Imported here so the supervisor process never loads the models
+    from tasks.document_tasks import process_document
+
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        with keep_alive(job):
+            process_document(job.document_id)
+        # process_document leaves the document in Processed or Error
+        document = db.get(Document, job.document_id)
+        if not finish_job(db, job, document.status_id):
+            logging.warning(
+                f"Job {job.job_id} was requeued while running, outcome discarded"
+            )
+    finally:
+        db.close()
+
+
+def run_worker(stop_event=None, ready_event=None):
+    """
+    Worker process loop: warm up one GrainAnalyzer, then pull jobs until
+    stop_event is set. ready_event is set once the models are warm, no job
+    is claimed before.
+    """
+    from core.grain_analysis import warm_up_grain_analyzer
+
+    setup_logging()
+    # Leave shutdown to the supervisor, finish the current job first
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    worker_id = worker_id_for(os.getpid())
+    logging.info(f"Worker {worker_id} starting")
+    warm_up_grain_analyzer()
+    if ready_event is not None:
+        ready_event.set()
+    logging.info(f"Worker {worker_id} ready")
+
+    while stop_event is None or not stop_event.is_set():
+        db = SessionLocal()
+        try:
+            job = claim_next_job(db, worker_id)
+            job_id = job.id if job else None
+        except Exception as e:
+            logging.error(f"Worker {worker_id} failed to claim a job: {e}")
+            job_id = None
+        finally:
+            db.close()
+
+        if job_id is None:
+            if stop_event is None:
+                time.sleep(settings.WORKER_POLL_INTERVAL)
+            else:
+                stop_event.wait(settings.WORKER_POLL_INTERVAL)
+            continue
+
+        logging.info(f"Worker {worker_id} picked up job {job_id}")
+        try:
+            run_job(job_id)
+        except Exception as e:
+            logging.error(f"Worker {worker_id} crashed on job {job_id}: {e}")
+            requeue_jobs(worker_id)
+
+    logging.info(f"Worker {worker_id} stopped")
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    """
+    Serves /metrics of all worker processes, /health, and /ready which
+    answers 503 until every worker has warmed up its models.
+    """
+
+    def do_GET(self):
+        status = 200
+        if self.path == "/metrics":
+            body, content_type = metrics.exposition(), CONTENT_TYPE_LATEST
+        elif self.path == "/health":
+            body, content_type = b"ok", "text/plain"
+        elif self.path == "/ready":
+            warm, total = self.server.readiness()
+            if not total or warm < total:
+                status = 503
+            body = json.dumps(
+                {"ready": status == 200, "workers": total, "warm": warm}
+            ).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scraped every few seconds, keep it out of the logs
+        pass
+
+
+def start_health_server(port: int, readiness) -> ThreadingHTTPServer:
+    """
+    Serve HealthHandler on a background thread. readiness() returns how
+    many workers are warm, and how many there are.
+
+    Worker processes write their metrics to METRICS_DIR, so this server can
+    expose them all however often workers are restarted. The directory is
+    cleared first, leftovers from an earlier run would be counted too.
+    """
+    metrics_dir = os.environ.setdefault(
+        metrics.MULTIPROC_ENV, os.path.abspath(settings.METRICS_DIR)
+    )
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), HealthHandler)
+    server.readiness = readiness
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"Worker metrics on port {port}")
+    return server
+
+
+def run_pool(workers: int = None):
+    """
+    Start a pool of worker processes and keep it at full size until
+    interrupted.
+    """
+    workers = workers or settings.ANALYSIS_WORKERS
+
+    requeue_jobs()
+    last_requeue = time.monotonic()
+
+    # TensorFlow and torch don't survive fork, start clean interpreters
+    ctx = multiprocessing.get_context("spawn")
+    stop_event = ctx.Event()
+    processes = []
+    # Set by each worker once its models are warm, see run_worker()
+    ready_events = []
+
+    def spawn():
+        ready_event = ctx.Event()
+        process = ctx.Process(
+            target=run_worker, args=(stop_event, ready_event), daemon=False
+        )
+        process.start()
+        return process, ready_event
+
+    def readiness():
+        return sum(event.is_set() for event in ready_events), len(processes)
+
+    def shutdown(*args):
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Before spawning, workers pick up the metrics directory at startup
+    if settings.WORKER_METRICS_PORT:
+        start_health_server(settings.WORKER_METRICS_PORT, readiness)
+
+    logging.info(f"Starting {workers} analysis worker(s)")
+    for _ in range(workers):
+        process, ready_event = spawn()
+        processes.append(process)
+        ready_events.append(ready_event)
+
+    while not stop_event.is_set():
+        for i, process in enumerate(processes):
+            if not process.is_alive():
+                logging.warning(
+                    f"Worker pid {process.pid} exited with code {process.exitcode}, restarting"
+                )
+                if metrics.MULTIPROC_ENV in os.environ:
+                    multiprocess.mark_process_dead(process.pid)
+                # Killed mid-job, e.g. out of memory: its job would stay running
+                requeue_jobs(worker_id_for(process.pid))
+                processes[i], ready_events[i] = spawn()
+        # Also catches jobs of workers on other hosts that went away
+        if time.monotonic() - last_requeue >= settings.JOB_REQUEUE_INTERVAL:
+            requeue_jobs()
+            last_requeue = time.monotonic()
+        stop_event.wait(settings.WORKER_POLL_INTERVAL)
+
+    logging.info("Waiting for workers to finish their current job...")
+    for process in processes:
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run grain analysis workers")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.ANALYSIS_WORKERS,
+        help="number of worker processes",
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    run_pool(args.workers)
+
+
+if __name__ == "__main__":
+    main()
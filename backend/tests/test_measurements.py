@@ -0,0 +1,82 @@
+# tests/test_measurements.py
+"""
+GrainCollection.measure() against Grain.measure(), grain by grain.
+
+Run from backend/:
+
+    python -m pytest
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+import shapely.affinity
+
+from benchmarks.synthetic import make_image, make_polygons
+from core import interactions as si
+
+SHAPE = (300, 400)
+
+
+@pytest.fixture
+def polygons() -> list:
+    polygons = make_polygons(12, SHAPE, seed=1)
+    # Clockwise outlines, measure_polygons() must not depend on orientation
+    polygons[1::2] = [p.reverse() for p in polygons[1::2]]
+    # Holes are dropped, grains are measured on their exterior ring
+    hole = shapely.affinity.scale(polygons[0], 0.4, 0.4).exterior
+    polygons[0] = shapely.Polygon(polygons[0].exterior, [hole])
+    return polygons
+
+
+@pytest.fixture
+def degenerate() -> list:
+    return [
+        None,
+        shapely.Polygon(),
+        # Self-intersecting bowtie
+        shapely.Polygon([(10, 10), (30, 30), (30, 10), (10, 30)]),
+        # No area
+        shapely.Polygon([(10, 10), (20, 20), (30, 30)]),
+    ]
+
+
+def measure_each(polygons: list, image: np.ndarray = None) -> pd.DataFrame:
+    return pd.DataFrame([g.measure() for g in si.polygons_to_grains(polygons, image)])
+
+
+def test_measure_matches_grain_measure(polygons):
+    image = make_image(SHAPE, polygons, seed=1)
+    expected = measure_each(polygons, image)
+    data = si.GrainCollection.from_polygons(polygons, image).measure()
+
+    assert list(data.columns) == list(expected.columns)
+    assert len(data) == len(polygons)
+    np.testing.assert_allclose(data.to_numpy(), expected.to_numpy())
+
+
+def test_measure_without_image(polygons):
+    expected = measure_each(polygons)
+    data = si.GrainCollection.from_polygons(polygons).measure()
+
+    assert list(data.columns) == list(expected.columns)
+    np.testing.assert_allclose(data.to_numpy(), expected.to_numpy())
+
+
+def test_measure_skips_degenerate_polygons(polygons, degenerate):
+    mixed = degenerate[:2] + polygons + degenerate[2:]
+    image = make_image(SHAPE, polygons, seed=1)
+    expected = measure_each(mixed, image)
+    collection = si.GrainCollection.from_polygons(mixed, image)
+    data = collection.measure()
+
+    assert len(collection) == len(polygons) == len(expected)
+    np.testing.assert_allclose(data.to_numpy(), expected.to_numpy())
+
+
+def test_measure_only_degenerate_polygons(degenerate):
+    collection = si.GrainCollection.from_polygons(degenerate)
+
+    assert len(collection) == 0
+    assert collection.measure().empty
@@ -79,12 +79,12 @@ export default function Documents() {
     e.preventDefault();
     if (!file) return;
 
-    const formData = new FormData();
-    formData.append("file", file);
-
-    // Use axios to send request
-    const res = await axios.post("/api/documents/upload", formData, {
-      headers: getAuthHeaders(),
+    // Sent as the raw body, the server writes it to disk as it arrives
+    const res = await axios.post("/api/documents/upload", file, {
+      params: { filename: file.name },
+      headers: getAuthHeaders({
+        "Content-Type": file.type || "application/octet-stream",
+      }),
     });
 
     fetchDocuments();